@@ -0,0 +1,138 @@
+import os
+import json
+import time
+import queue
+import random
+import logging
+import logging.handlers
+
+"""
+* access log terstruktur: satu baris JSON per request (waktu, client, perintah,
+  file, status, bytes masuk/keluar, durasi), ditulis di luar jalur request
+
+* worker hanya menaruh record ke antrian (QueueHandler); satu QueueListener
+  di proses utama yang memformat dan menulis ke RotatingFileHandler
+* untuk processpool antriannya multiprocessing.Queue, dan log biasa dari
+  worker ikut lewat antrian yang sama sehingga baris di stderr tidak
+  bertumpuk antar proses
+* konfigurasi lewat environment variable:
+  FILE_SERVER_ACCESS_LOG          path file log (kosong = access log mati)
+  FILE_SERVER_ACCESS_LOG_SAMPLE   fraksi request sukses yang dicatat (default 1.0);
+                                  request gagal selalu dicatat
+  FILE_SERVER_ACCESS_LOG_MAX_MB   ukuran sebelum rotasi (default 10)
+  FILE_SERVER_ACCESS_LOG_BACKUPS  jumlah file rotasi yang disimpan (default 5)
+"""
+
+ACCESS_LOGGER = 'file_server.access'
+
+_logger = logging.getLogger(ACCESS_LOGGER)
+_logger.propagate = False
+_sample_rate = None
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        return json.dumps(record.access)
+
+
+class AccessLogWriter:
+    """Listener di proses utama yang menulis record dari antrian"""
+    def __init__(self, path=None, sample_rate=None, max_bytes=None, backups=None, context=None,
+                 forward_logs=False):
+        self.path = path if path is not None else os.environ.get('FILE_SERVER_ACCESS_LOG') or None
+        if sample_rate is None:
+            sample_rate = float(os.environ.get('FILE_SERVER_ACCESS_LOG_SAMPLE', 1.0))
+        self.sample_rate = sample_rate
+        max_bytes = max_bytes or int(float(os.environ.get('FILE_SERVER_ACCESS_LOG_MAX_MB', 10)) * 1024 * 1024)
+        backups = backups if backups is not None else int(os.environ.get('FILE_SERVER_ACCESS_LOG_BACKUPS', 5))
+        self.queue = context.Queue() if context is not None else queue.SimpleQueue()
+        self.attached = False
+
+        handlers = []
+        if self.path:
+            access = logging.handlers.RotatingFileHandler(self.path, maxBytes=max_bytes, backupCount=backups)
+            access.setFormatter(JsonFormatter())
+            access.addFilter(lambda record: record.name == ACCESS_LOGGER)
+            handlers.append(access)
+        if forward_logs:
+            # log biasa dari worker proses lain diteruskan ke handler stderr proses utama
+            console = logging.StreamHandler()
+            console.setFormatter(logging.Formatter('%(levelname)s:%(name)s:%(message)s'))
+            console.addFilter(lambda record: record.name != ACCESS_LOGGER)
+            handlers.append(console)
+        self.listener = logging.handlers.QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def stop(self):
+        if self.attached:
+            detach()
+            self.attached = False
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+
+
+def attach(log_queue, sample_rate, forward_logs=False, level=None):
+    """Pasang QueueHandler di proses ini (dipanggil di setiap worker)"""
+    global _sample_rate
+    handler = logging.handlers.QueueHandler(log_queue)
+    if sample_rate is not None:
+        _logger.handlers = [handler]
+        _logger.setLevel(logging.INFO)
+        _sample_rate = sample_rate
+    if forward_logs:
+        root = logging.getLogger()
+        root.handlers = [handler]
+        if level is not None:
+            root.setLevel(level)
+
+
+def detach():
+    global _sample_rate
+    _logger.handlers = []
+    _sample_rate = None
+
+
+def start(context=None, forward_logs=False):
+    """Mulai writer dari konfigurasi environment; None bila tidak ada yang perlu ditulis"""
+    writer = AccessLogWriter(context=context, forward_logs=forward_logs)
+    if not writer.enabled and not forward_logs:
+        writer.stop()
+        return None
+    if context is None:
+        attach(writer.queue, writer.sample_rate if writer.enabled else None)
+        writer.attached = True
+    return writer
+
+
+def request_summary(command_block):
+    """(perintah, file) dari awal request tanpa menyalin payload upload yang besar"""
+    parts = command_block[:256].split(' ', 2)
+    return parts[0].strip().upper(), parts[1] if len(parts) > 1 else ''
+
+
+def log_request(client, command_block, started, bytes_out, ok):
+    """Catat satu request; sangat murah bila access log mati atau request tidak tersampel"""
+    if _sample_rate is None or (ok and _sample_rate < 1.0 and random.random() >= _sample_rate):
+        return
+    command, target = request_summary(command_block)
+    _logger.info('', extra=dict(access=dict(
+        ts=round(time.time(), 3),
+        client=f"{client[0]}:{client[1]}" if isinstance(client, tuple) else str(client),
+        command=command,
+        file=target,
+        status='OK' if ok else 'ERROR',
+        bytes_in=len(command_block) + 4,
+        bytes_out=bytes_out,
+        duration_ms=round((time.perf_counter() - started) * 1000, 3),
+        pid=os.getpid(),
+    )))
+
+
+def response_ok(first_block):
+    # json.dumps menjaga urutan field, jadi status selalu di awal respons
+    return first_block.startswith(b'{"status": "OK"')
@@ -0,0 +1,244 @@
+import os
+import math
+import time
+import logging
+import threading
+import multiprocessing
+
+"""
+* ukuran pool worker yang bisa berubah saat server berjalan
+
+* ResizableExecutor membungkus ThreadPoolExecutor/ProcessPoolExecutor; untuk
+  mengubah ukuran dibuat executor baru dan executor lama di-shutdown tanpa
+  menunggu, sehingga koneksi yang sedang atau masih antri di executor lama
+  tetap diselesaikan (tidak ada koneksi yang diputus)
+* Autoscaler menilai antrian, utilisasi worker, latensi koneksi dan CPU
+  setiap interval, lalu membesarkan/mengecilkan pool di antara min dan max
+* ukuran bisa diatur manual lewat perintah admin POOLSIZE <n>; POOLSIZE AUTO
+  mengembalikan ke autoscaling. Perintah bisa diterima worker proses mana
+  pun, jadi permintaannya disampaikan lewat multiprocessing.Value
+* konfigurasi lewat environment variable:
+  FILE_SERVER_POOL_MIN / FILE_SERVER_POOL_MAX  batas ukuran (default 1 dan 4x ukuran awal);
+                                               juga batas untuk POOLSIZE manual
+  FILE_SERVER_POOL_AUTO                        1/0 autoscaling (default: aktif hanya bila
+                                               MIN atau MAX diset, supaya benchmark dengan
+                                               jumlah worker tetap tidak berubah sendiri)
+  FILE_SERVER_POOL_INTERVAL                    detik antar evaluasi (default 2)
+  FILE_SERVER_POOL_LATENCY_MS                  target p90 durasi koneksi (opsional)
+  FILE_SERVER_POOL_CPU_MAX                     CPU (%) di atas ini pool tidak dibesarkan (default 90)
+"""
+
+
+class PoolControl:
+    """State ukuran pool yang dibagi ke worker (seperti ServerStats)"""
+    def __init__(self, size, minimum=None, maximum=None, context=None):
+        context = context or multiprocessing
+        explicit = bool(minimum or maximum or os.environ.get('FILE_SERVER_POOL_MIN')
+                        or os.environ.get('FILE_SERVER_POOL_MAX'))
+        minimum = int(minimum or os.environ.get('FILE_SERVER_POOL_MIN', 1))
+        maximum = int(maximum or os.environ.get('FILE_SERVER_POOL_MAX', max(size * 4, minimum)))
+        auto = os.environ.get('FILE_SERVER_POOL_AUTO')
+        auto = auto not in ('', '0') if auto is not None else explicit
+        self.size = context.Value('i', size)
+        self.minimum = context.Value('i', min(minimum, maximum, size))
+        self.maximum = context.Value('i', max(minimum, maximum, size))
+        self.requested = context.Value('i', 0)
+        self.auto = context.Value('b', int(auto and minimum < maximum))
+
+    def clamp(self, size):
+        return max(self.minimum.value, min(self.maximum.value, size))
+
+    def request(self, size):
+        self.requested.value = size
+        self.auto.value = 0
+
+    def resume_auto(self):
+        self.auto.value = 1
+
+    def snapshot(self):
+        return dict(size=self.size.value, min=self.minimum.value, max=self.maximum.value,
+                    auto=bool(self.auto.value), requested=self.requested.value or None)
+
+
+class ResizableExecutor:
+    def __init__(self, factory, size):
+        self.factory = factory
+        self.size = size
+        self.executor = factory(size)
+        self.retired = []
+        # jumlah pekerjaan yang belum selesai per executor; executor lama dilepas saat 0
+        self.pending = {self.executor: 0}
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.durations = []
+
+    def submit(self, fn, *args):
+        submitted = time.perf_counter()
+        with self.lock:
+            self.in_flight += 1
+            executor = self.executor
+            future = executor.submit(fn, *args)
+            self.pending[executor] += 1
+
+        def done(_):
+            with self.lock:
+                self.in_flight -= 1
+                self.durations.append(time.perf_counter() - submitted)
+                self.pending[executor] -= 1
+                if executor is not self.executor and not self.pending[executor]:
+                    self.release(executor)
+
+        future.add_done_callback(done)
+        return future
+
+    def resize(self, size):
+        with self.lock:
+            if size == self.size:
+                return
+            old = self.executor
+            self.executor = self.factory(size)
+            self.pending[self.executor] = 0
+            self.size = size
+            # pekerjaan yang sudah masuk executor lama tetap dijalankan sampai selesai
+            old.shutdown(wait=False)
+            if self.pending[old]:
+                self.retired.append(old)
+            else:
+                del self.pending[old]
+
+    def release(self, executor):
+        # dipanggil dengan self.lock dipegang, setelah pekerjaan terakhir executor lama selesai
+        del self.pending[executor]
+        if executor in self.retired:
+            self.retired.remove(executor)
+
+    def metrics(self):
+        """Ambil dan reset jendela durasi koneksi sejak panggilan sebelumnya"""
+        with self.lock:
+            durations, self.durations = self.durations, []
+            in_flight = self.in_flight
+        durations.sort()
+        p90 = durations[int(len(durations) * 0.9)] * 1000 if durations else None
+        return dict(in_flight=in_flight, queue=max(0, in_flight - self.size),
+                    utilization=min(in_flight, self.size) / self.size, p90_ms=p90, completed=len(durations))
+
+    def shutdown(self, wait=True):
+        with self.lock:
+            executors = self.retired + [self.executor]
+        for executor in executors:
+            executor.shutdown(wait=wait)
+
+
+class CpuMeter:
+    """Utilisasi CPU seluruh mesin dari /proc/stat (None bila tidak tersedia)"""
+    def __init__(self):
+        self.prev = self.read()
+
+    def read(self):
+        try:
+            with open('/proc/stat') as f:
+                values = [int(x) for x in f.readline().split()[1:]]
+            return sum(values), values[3] + values[4]
+        except (OSError, ValueError, IndexError):
+            return None
+
+    def utilization(self):
+        now = self.read()
+        prev, self.prev = self.prev, now
+        if now is None or prev is None or now[0] == prev[0]:
+            return None
+        return 100 * (1 - (now[1] - prev[1]) / (now[0] - prev[0]))
+
+
+class Autoscaler(threading.Thread):
+    def __init__(self, executor, control, name="pool"):
+        super().__init__(daemon=True)
+        self.executor = executor
+        self.control = control
+        self.name_label = name
+        self.interval = float(os.environ.get('FILE_SERVER_POOL_INTERVAL', 2))
+        latency = os.environ.get('FILE_SERVER_POOL_LATENCY_MS')
+        self.latency_target = float(latency) if latency else None
+        self.cpu_max = float(os.environ.get('FILE_SERVER_POOL_CPU_MAX', 90))
+        self.cpu = CpuMeter()
+        self.idle_rounds = 0
+        self.holding = False
+        self.stop_event = threading.Event()
+        self.decisions = []
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self):
+        last_evaluation = time.monotonic()
+        # permintaan manual dicek lebih sering agar POOLSIZE terasa langsung
+        while not self.stop_event.wait(min(0.5, self.interval)):
+            requested = self.control.requested.value
+            if requested:
+                self.control.requested.value = 0
+                self.apply(requested, "manual (POOLSIZE)", self.executor.metrics(), None)
+                continue
+            if time.monotonic() - last_evaluation >= self.interval:
+                last_evaluation = time.monotonic()
+                self.evaluate()
+
+    def decide(self, size, metrics, cpu):
+        """Ukuran baru beserta alasannya, atau (size, None) bila tetap"""
+        minimum, maximum = self.control.minimum.value, self.control.maximum.value
+        cpu_saturated = cpu is not None and cpu >= self.cpu_max
+        slow = self.latency_target is not None and metrics['p90_ms'] is not None \
+            and metrics['p90_ms'] > self.latency_target
+        busy = metrics['queue'] > 0 or metrics['utilization'] >= 0.8 or slow
+
+        if busy:
+            self.idle_rounds = 0
+            if size >= maximum:
+                return size, None
+            if cpu_saturated:
+                return size, "tahan: CPU jenuh, worker tambahan tidak membantu"
+            step = max(1, metrics['queue'], math.ceil(size * 0.5))
+            reason = "antrian" if metrics['queue'] else ("latensi" if slow else "utilisasi tinggi")
+            return min(maximum, size + step), f"naik ({reason})"
+
+        if metrics['utilization'] < 0.3 and size > minimum:
+            # turunkan hanya setelah beberapa putaran sepi berturut-turut
+            self.idle_rounds += 1
+            if self.idle_rounds >= 3:
+                self.idle_rounds = 0
+                target = max(minimum, metrics['in_flight'] + 1, min(size - 1, math.ceil(size * 0.75)))
+                return target, "turun (utilisasi rendah)"
+        else:
+            self.idle_rounds = 0
+        return size, None
+
+    def evaluate(self):
+        metrics = self.executor.metrics()
+        cpu = self.cpu.utilization()
+        if not self.control.auto.value:
+            return
+        new_size, reason = self.decide(self.executor.size, metrics, cpu)
+        if reason and new_size == self.executor.size:
+            # keputusan menahan ukuran hanya dicatat saat pertama kali terjadi
+            if not self.holding:
+                self.log(self.executor.size, new_size, reason, metrics, cpu)
+            self.holding = True
+        elif reason:
+            self.holding = False
+            self.apply(new_size, reason, metrics, cpu)
+        else:
+            self.holding = False
+
+    def apply(self, size, reason, metrics, cpu):
+        old = self.executor.size
+        size = self.control.clamp(size)
+        self.executor.resize(size)
+        self.control.size.value = size
+        self.log(old, size, reason, metrics, cpu)
+
+    def log(self, old, new, reason, metrics, cpu):
+        p90 = f"{metrics['p90_ms']:.0f}ms" if metrics['p90_ms'] is not None else "-"
+        cpu_text = f"{cpu:.0f}%" if cpu is not None else "-"
+        message = (f"[AUTOSCALE] {self.name_label} {old} -> {new}: {reason} "
+                   f"(antrian={metrics['queue']}, utilisasi={metrics['utilization']:.2f}, p90={p90}, cpu={cpu_text})")
+        self.decisions.append(dict(ts=time.time(), old=old, new=new, reason=reason, **metrics, cpu=cpu))
+        logging.warning(message)
@@ -0,0 +1,82 @@
+import os
+import csv
+import time
+import base64
+import shutil
+import tempfile
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from file_interface import FileInterface, DURABILITY
+
+
+def bench_mode(durability, clients, uploads, file_size, same_name):
+    """Jalankan upload bersamaan terhadap FileInterface dengan satu mode durability"""
+    workdir = tempfile.mkdtemp(prefix="bench_durability_", dir=os.environ.get('BENCH_DIR'))
+    try:
+        store = FileInterface(directory=workdir, durability=durability)
+        payloads = [os.urandom(file_size) for _ in range(clients)]
+        encoded = [base64.b64encode(p).decode() for p in payloads]
+
+        def worker(client_id):
+            latencies = []
+            for i in range(uploads):
+                name = "shared.dat" if same_name else f"c{client_id}_{i}.dat"
+                start = time.perf_counter()
+                result = store.upload([name, encoded[client_id]])
+                latencies.append(time.perf_counter() - start)
+                if result['status'] != 'OK':
+                    raise RuntimeError(result['data'])
+            return latencies
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=clients) as pool:
+            latencies = sorted(x for r in pool.map(worker, range(clients)) for x in r)
+        duration = time.perf_counter() - start
+
+        # setiap file hasil akhir harus identik dengan salah satu payload utuh
+        torn = 0
+        if same_name:
+            with open(os.path.join(workdir, "shared.dat"), 'rb') as fp:
+                torn = int(fp.read() not in payloads)
+
+        total = clients * uploads
+        return {
+            'durability': durability,
+            'clients': clients,
+            'uploads': total,
+            'file_size': file_size,
+            'total_time': round(duration, 3),
+            'uploads_per_sec': round(total / duration, 1),
+            'throughput': round(total * file_size / duration / (1024 ** 2), 2),
+            'p50_ms': round(latencies[len(latencies) // 2] * 1000, 3),
+            'p99_ms': round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 3),
+            'fsync_batches': store.committer.batches if store.committer else '',
+            'torn_files': torn,
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ukur tradeoff throughput vs durability untuk upload")
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--uploads", type=int, default=20, help="Upload per client")
+    parser.add_argument("--file-size", type=int, default=64 * 1024)
+    parser.add_argument("--same-name", action="store_true", help="Semua client mengunggah nama file yang sama")
+    parser.add_argument("--output", help="Simpan hasil ke CSV")
+    args = parser.parse_args()
+
+    rows = []
+    for mode in DURABILITY:
+        row = bench_mode(mode, args.clients, args.uploads, args.file_size, args.same_name)
+        rows.append(row)
+        print(f"{mode:<6} {row['uploads_per_sec']:>10} upload/s {row['throughput']:>9} MB/s "
+              f"p50 {row['p50_ms']} ms p99 {row['p99_ms']} ms batches {row['fsync_batches']} torn {row['torn_files']}")
+
+    if args.output:
+        with open(args.output, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"[INFO] Results exported to {args.output}")
@@ -0,0 +1,82 @@
+import os
+import csv
+import time
+import base64
+import random
+import shutil
+import tempfile
+import argparse
+
+from file_interface import FileInterface
+
+
+def populate(store, count, payload):
+    for i in range(count):
+        target = store._path(f"f{i:07d}.dat")
+        if store.layout == 'sharded':
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, 'wb') as fp:
+            fp.write(payload)
+
+
+def measure(func, repeat):
+    samples = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        func(i)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return samples[len(samples) // 2] * 1000, samples[-1] * 1000
+
+
+def bench_case(layout, depth, count, samples, file_size):
+    """Ukur latensi LIST/GET/UPLOAD langsung pada FileInterface (tanpa jaringan)"""
+    workdir = tempfile.mkdtemp(prefix="bench_layout_")
+    try:
+        store = FileInterface(directory=workdir, layout=layout, depth=depth)
+        payload = os.urandom(file_size)
+        encoded = base64.b64encode(payload).decode()
+        populate(store, count, payload)
+
+        rng = random.Random(count)
+        names = [f"f{rng.randrange(count):07d}.dat" for _ in range(samples)]
+        return {
+            'layout': layout if layout == 'flat' else f"{layout}{depth}",
+            'file_count': count,
+            'list': measure(lambda i: store.list(), min(samples, 5)),
+            'get': measure(lambda i: store.get([names[i]]), samples),
+            'upload': measure(lambda i: store.upload([f"new{i:07d}.dat", encoded]), samples),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bandingkan latensi layout flat vs sharded")
+    parser.add_argument("--counts", default="1000,10000,100000")
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--file-size", type=int, default=1024)
+    parser.add_argument("--output", help="Simpan hasil ke CSV")
+    args = parser.parse_args()
+
+    layouts = [('flat', 1), ('sharded', 2), ('sharded', 3)]
+    rows = []
+    print(f"{'layout':<10}{'files':>10}{'LIST p50/max ms':>22}{'GET p50/max ms':>22}{'UPLOAD p50/max ms':>22}")
+    for count in [int(x) for x in args.counts.split(',')]:
+        for layout, depth in layouts:
+            r = bench_case(layout, depth, count, args.samples, args.file_size)
+            print(f"{r['layout']:<10}{r['file_count']:>10}"
+                  + "".join(f"{r[op][0]:>13.3f}/{r[op][1]:<8.3f}" for op in ('list', 'get', 'upload')))
+            rows.append({
+                'layout': r['layout'], 'file_count': r['file_count'],
+                'list_p50_ms': round(r['list'][0], 3), 'list_max_ms': round(r['list'][1], 3),
+                'get_p50_ms': round(r['get'][0], 3), 'get_max_ms': round(r['get'][1], 3),
+                'upload_p50_ms': round(r['upload'][0], 3), 'upload_max_ms': round(r['upload'][1], 3),
+            })
+
+    if args.output:
+        with open(args.output, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0].keys()))
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"[INFO] Results exported to {args.output}")
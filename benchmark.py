@@ -0,0 +1,231 @@
+import os
+import csv
+import time
+import shutil
+import socket
+import asyncio
+import logging
+import tempfile
+import threading
+import multiprocessing
+from datetime import datetime
+
+from file_protocol import FileProtocol
+from file_server import Server
+from file_server_threadpool import FileTransferThreadServer
+from file_server_processpool import FileServer
+from file_client_threadpool import FileTransferClient, run_stress_test as run_thread_clients
+from file_client_processpool import run_stress_test as run_process_clients
+from file_client_async import run_stress_test as run_async_clients, raise_fd_limit
+from generator import FileGenerator
+from latency_stats import LATENCY_COLUMNS, latency_columns, mean_ci
+
+VARIANTS = ('thread', 'threadpool', 'processpool')
+CLIENT_MODES = {
+    'thread': run_thread_clients,
+    'process': run_process_clients,
+    'async': lambda *args: asyncio.run(run_async_clients(*args)),
+}
+RUN_COLUMNS = [
+    'timestamp', 'variant', 'repetition', 'operation', 'volume', 'client_workers', 'server_workers',
+    'total_time', 'throughput', 'client_success', 'client_fail', 'server_success', 'server_fail'
+] + LATENCY_COLUMNS
+SUMMARY_COLUMNS = [
+    'variant', 'operation', 'volume', 'client_workers', 'server_workers', 'repetitions',
+    'total_time_mean', 'total_time_ci95', 'throughput_mean', 'throughput_ci95',
+    'latency_p50_ms_mean', 'latency_p50_ms_ci95', 'latency_p99_ms_mean', 'latency_p99_ms_ci95',
+    'client_success', 'client_fail', 'server_success', 'server_fail'
+]
+
+
+def free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class LocalServer:
+    """Menjalankan satu varian server di localhost dalam proses benchmark"""
+    def __init__(self, variant, workers, storage_dir):
+        self.variant = variant
+        self.workers = workers
+        self.port = free_port()
+        if variant == 'thread':
+            self.server = Server(ipaddress='127.0.0.1', port=self.port, protocol=FileProtocol(directory=storage_dir))
+            self.server.daemon = True
+            self.thread = self.server
+        elif variant == 'threadpool':
+            self.server = FileTransferThreadServer(host="127.0.0.1", port=self.port, thread_limit=workers,
+                                                   protocol=FileProtocol(directory=storage_dir))
+            self.thread = threading.Thread(target=self.server.run, daemon=True)
+        else:
+            # spawn, bukan fork: worker hasil fork ikut mewarisi socket client milik
+            # proses benchmark sehingga koneksi tidak pernah mendapat EOF
+            self.server = FileServer(host="127.0.0.1", port=self.port, max_workers=workers,
+                                     store_options=dict(directory=storage_dir),
+                                     mp_context=multiprocessing.get_context('spawn'))
+            self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def start(self, timeout=10):
+        self.thread.start()
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            try:
+                socket.create_connection(("127.0.0.1", self.port), timeout=1).close()
+                return self
+            except OSError:
+                time.sleep(0.05)
+        raise RuntimeError(f"server {self.variant} tidak bisa dihubungi di port {self.port}")
+
+    def stop(self):
+        self.server.stop()
+        self.thread.join(timeout=30)
+
+
+class BenchmarkRunner:
+    def __init__(self, workdir, client_mode='thread', warmup=1, repetitions=3, cooldown=1.0):
+        self.workdir = workdir
+        self.storage_dir = os.path.join(workdir, 'storage')
+        self.upload_dir = os.path.join(workdir, 'client')
+        self.download_dir = os.path.join(workdir, 'downloads')
+        self.run_clients = CLIENT_MODES[client_mode]
+        self.warmup = warmup
+        self.repetitions = repetitions
+        self.cooldown = cooldown
+        self.runs = []
+        self.summary = []
+
+    def prepare_files(self, sizes_mb):
+        for directory in (self.storage_dir, self.upload_dir, self.download_dir):
+            os.makedirs(directory, exist_ok=True)
+        for size in sizes_mb:
+            name = f"test_{size}mb.dat"
+            source = os.path.join(self.upload_dir, name)
+            if not os.path.exists(source):
+                FileGenerator.generate_file(source, size)
+            # salinan terpisah, supaya download yang menimpa file lokal tidak ikut
+            # mengubah file yang sedang dibaca server
+            shutil.copyfile(source, os.path.join(self.storage_dir, name))
+
+    def run_case(self, server, operation, size, clients):
+        name = f"test_{size}mb.dat"
+        # client download menulis ke cwd, client upload membaca dari cwd
+        os.chdir(self.download_dir if operation == 'download' else self.upload_dir)
+        if operation == 'download':
+            # case upload sebelumnya bisa saja meninggalkan file rusak di storage
+            shutil.copyfile(os.path.join(self.upload_dir, name), os.path.join(self.storage_dir, name))
+        stats_client = FileTransferClient("127.0.0.1", server.port)
+
+        for _ in range(self.warmup):
+            self.run_clients("127.0.0.1", server.port, operation, name, clients)
+
+        case_runs = []
+        for repetition in range(1, self.repetitions + 1):
+            time.sleep(self.cooldown)
+            ok_before, before = stats_client.fetch_server_stats()
+            result = self.run_clients("127.0.0.1", server.port, operation, name, clients)
+            ok_after, after = stats_client.fetch_server_stats()
+            counted = ok_before and ok_after
+            run = {
+                'timestamp': datetime.now().isoformat(),
+                'variant': server.variant,
+                'repetition': repetition,
+                'operation': operation,
+                'volume': f"{size} MB",
+                'client_workers': clients,
+                'server_workers': server.workers,
+                'total_time': round(result['total_time'], 3),
+                'throughput': round(result['throughput'] / (1024 ** 2), 2),
+                'client_success': result['successes'],
+                'client_fail': result['failures'],
+                'server_success': after['success'] - before['success'] if counted else '',
+                'server_fail': after['fail'] - before['fail'] if counted else '',
+                **latency_columns(result['requests']),
+            }
+            case_runs.append(run)
+        self.runs.extend(case_runs)
+        return self.summarize(case_runs)
+
+    def summarize(self, case_runs):
+        first = case_runs[0]
+        row = {key: first[key] for key in ('variant', 'operation', 'volume', 'client_workers', 'server_workers')}
+        row['repetitions'] = len(case_runs)
+        for column in ('total_time', 'throughput', 'latency_p50_ms', 'latency_p99_ms'):
+            mean, ci = mean_ci([r[column] for r in case_runs])
+            row[column + '_mean'] = round(mean, 3) if mean is not None else ''
+            row[column + '_ci95'] = round(ci, 3) if ci is not None else ''
+        for column in ('client_success', 'client_fail', 'server_success', 'server_fail'):
+            row[column] = sum(r[column] for r in case_runs if r[column] != '')
+        self.summary.append(row)
+        print(f"{row['variant']:<12} sw={row['server_workers']:<3} {row['operation']:<8} {row['volume']:>7} "
+              f"cw={row['client_workers']:<4} {row['throughput_mean']} ±{row['throughput_ci95']} MB/s "
+              f"p99 {row['latency_p99_ms_mean']} ms server ok/fail {row['server_success']}/{row['server_fail']}")
+        return row
+
+    def sweep(self, variants, server_workers, client_counts, operations, sizes_mb):
+        self.prepare_files(sizes_mb)
+        for variant in variants:
+            # server thread-per-connection tidak punya jumlah worker
+            for workers in ([0] if variant == 'thread' else server_workers):
+                server = LocalServer(variant, workers, self.storage_dir).start()
+                try:
+                    for operation in operations:
+                        for size in sizes_mb:
+                            for clients in client_counts:
+                                self.run_case(server, operation, size, clients)
+                finally:
+                    server.stop()
+
+    def export(self, output, runs_output=None):
+        with open(output, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=SUMMARY_COLUMNS, extrasaction='ignore')
+            writer.writeheader()
+            writer.writerows(self.summary)
+        print(f"[INFO] Results exported to {output}")
+        if runs_output:
+            with open(runs_output, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=RUN_COLUMNS)
+                writer.writeheader()
+                writer.writerows(self.runs)
+            print(f"[INFO] Per-run results exported to {runs_output}")
+
+
+def int_list(value):
+    return [int(x) for x in value.split(",") if x]
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark semua varian server di localhost dalam satu run")
+    parser.add_argument("--variants", default=",".join(VARIANTS))
+    parser.add_argument("--server-workers", type=int_list, default=[1, 5, 50])
+    parser.add_argument("--client-workers", type=int_list, default=[1, 5, 50])
+    parser.add_argument("--operations", default="download,upload")
+    parser.add_argument("--sizes", type=int_list, default=[10, 50, 100], help="Ukuran file (MB)")
+    parser.add_argument("--client-mode", choices=list(CLIENT_MODES), default="thread")
+    parser.add_argument("--warmup", type=int, default=1, help="Run pemanasan per case (tidak dicatat)")
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--cooldown", type=float, default=1.0, help="Jeda antar run (detik)")
+    parser.add_argument("--workdir", help="Direktori kerja (default: direktori sementara)")
+    parser.add_argument("--output", default="benchmark_results.csv")
+    parser.add_argument("--runs-output", help="CSV per run dengan skema stress test (untuk perbandingan)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.ERROR)
+    raise_fd_limit()
+    output = os.path.abspath(args.output)
+    runs_output = os.path.abspath(args.runs_output) if args.runs_output else None
+    workdir = os.path.abspath(args.workdir) if args.workdir else tempfile.mkdtemp(prefix="benchmark_")
+    original_cwd = os.getcwd()
+
+    runner = BenchmarkRunner(workdir, args.client_mode, args.warmup, args.repetitions, args.cooldown)
+    try:
+        runner.sweep(args.variants.split(","), args.server_workers, args.client_workers,
+                     args.operations.split(","), args.sizes)
+    finally:
+        os.chdir(original_cwd)
+        if runner.summary:
+            runner.export(output, runs_output)
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
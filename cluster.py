@@ -0,0 +1,391 @@
+import os
+import sys
+import time
+import bisect
+import hashlib
+import logging
+import argparse
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from file_client_threadpool import FileTransferClient
+from latency_stats import RequestTimer
+
+"""
+* mode cluster: beberapa instance server, masing-masing dengan storage
+  sendiri, diperlakukan sebagai satu file server
+
+* nama file dipetakan ke node lewat consistent hashing (HashRing) dengan
+  virtual node, dan setiap file disimpan di R node berurutan pada ring
+  (replication factor); menambah satu node hanya memindahkan ~1/N file
+* ClusterFileTransferClient punya antarmuka yang sama dengan
+  FileTransferClient, sehingga bisa dipakai stress test apa adanya:
+  - GET dicoba ke pemilik file berurutan (failover ke replika)
+  - UPLOAD/DELETE dikirim ke semua pemilik
+  - LIST dikirim ke semua node lalu hasilnya digabung
+* daftar node: "host:port,host:port" atau file berisi satu node per baris,
+  lewat argumen --nodes atau environment variable FILE_CLUSTER_NODES;
+  replication factor lewat --replicas atau FILE_CLUSTER_REPLICAS (default 1)
+* pemakaian:
+  python cluster.py serve --count 3 --base-port 7800 --root /tmp/cluster
+  python cluster.py list --nodes 127.0.0.1:7800,127.0.0.1:7801,127.0.0.1:7802
+  python cluster.py upload|get|delete <file> --nodes ...
+  python cluster.py rebalance --nodes <node lama + baru> [--drain <node>] [--dry-run]
+"""
+
+VIRTUAL_NODES = 64
+BATCH_COMMANDS = ('mget', 'mupload', 'mdelete')
+FANOUT_COMMANDS = ('list', 'stats', 'profile', 'poolsize')
+
+
+def parse_node(text):
+    host, _, port = text.strip().rpartition(':')
+    return (host or '127.0.0.1', int(port))
+
+
+def load_nodes(spec=None):
+    """Daftar (host, port) dari string dipisah koma atau dari file konfigurasi"""
+    spec = spec or os.environ.get('FILE_CLUSTER_NODES', '')
+    if os.path.isfile(spec):
+        with open(spec) as f:
+            items = [line.split('#')[0].strip() for line in f]
+    else:
+        items = spec.split(',')
+    nodes = [parse_node(item) for item in items if item.strip()]
+    if not nodes:
+        raise ValueError("daftar node cluster kosong (gunakan --nodes atau FILE_CLUSTER_NODES)")
+    return nodes
+
+
+def node_name(node):
+    return f"{node[0]}:{node[1]}"
+
+
+def ring_hash(key):
+    # md5 (bukan hash()) supaya posisi sama di semua proses dan semua client
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], 'big')
+
+
+class HashRing:
+    def __init__(self, nodes, replicas=1, virtual_nodes=VIRTUAL_NODES):
+        self.replicas = replicas
+        self.virtual_nodes = virtual_nodes
+        self.nodes = []
+        self.points = []
+        self.owners_at = []
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node):
+        if node in self.nodes:
+            return
+        self.nodes.append(node)
+        for i in range(self.virtual_nodes):
+            point = ring_hash(f"{node_name(node)}#{i}")
+            index = bisect.bisect(self.points, point)
+            self.points.insert(index, point)
+            self.owners_at.insert(index, node)
+
+    def remove(self, node):
+        self.nodes.remove(node)
+        keep = [(p, n) for p, n in zip(self.points, self.owners_at) if n != node]
+        self.points = [p for p, _ in keep]
+        self.owners_at = [n for _, n in keep]
+
+    def owners(self, filename):
+        """R node pertama searah jarum jam dari posisi nama file"""
+        wanted = min(self.replicas, len(self.nodes))
+        result = []
+        index = bisect.bisect(self.points, ring_hash(filename))
+        for step in range(len(self.points)):
+            node = self.owners_at[(index + step) % len(self.points)]
+            if node not in result:
+                result.append(node)
+                if len(result) == wanted:
+                    break
+        return result
+
+    def primary(self, filename):
+        return self.owners(filename)[0]
+
+
+class ClusterFileTransferClient:
+    """Router client-side: setiap perintah dikirim ke node pemilik file"""
+    def __init__(self, nodes, replicas=None):
+        replicas = replicas or int(os.environ.get('FILE_CLUSTER_REPLICAS', 1))
+        self.ring = HashRing(nodes, replicas)
+        self.clients = {node: FileTransferClient(*node) for node in nodes}
+
+    def _owners(self, filename):
+        return [self.clients[node] for node in self.ring.owners(os.path.basename(filename))]
+
+    def _fanout(self, fn, clients=None):
+        """Jalankan fn untuk setiap client; satu client langsung di thread pemanggil.
+
+        Tanpa pool bersama, sehingga konkurensi stress test tidak dibatasi
+        router: setiap panggilan memakai thread sendiri untuk replika tambahan.
+        """
+        clients = clients or list(self.clients.values())
+        results = [None] * len(clients)
+
+        def call(index):
+            results[index] = fn(clients[index])
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(1, len(clients))]
+        for thread in threads:
+            thread.start()
+        call(0)
+        for thread in threads:
+            thread.join()
+        return results
+
+    def send_request(self, command, timer=None):
+        parts = command.split(' ')
+        request = parts[0].strip().lower()
+        if request in FANOUT_COMMANDS:
+            return self._merge_fanout(request, command)
+        if request in BATCH_COMMANDS:
+            return dict(status='ERROR', data=f"{request.upper()} belum didukung mode cluster, gunakan per file")
+        if len(parts) < 2:
+            return self.clients[self.ring.nodes[0]].send_request(command, timer)
+        if request == 'get':
+            response = None
+            for client in self._owners(parts[1]):
+                response = client.send_request(command, timer)
+                if response.get('status') == 'OK':
+                    break
+            return response
+        # perubahan (upload/delete/lainnya) diterapkan ke semua pemilik
+        responses = self._fanout(lambda client: client.send_request(command), self._owners(parts[1]))
+        failed = [r for r in responses if r.get('status') != 'OK']
+        return failed[0] if failed else responses[0]
+
+    def _merge_fanout(self, request, command):
+        nodes = list(self.clients)
+        responses = self._fanout(lambda client: client.send_request(command), [self.clients[n] for n in nodes])
+        failed = {node_name(n): r.get('data') for n, r in zip(nodes, responses) if r.get('status') != 'OK'}
+        if request != 'list':
+            data = {node_name(n): r.get('data') for n, r in zip(nodes, responses)}
+            return dict(status='ERROR' if failed else 'OK', data=data)
+        # dengan R replika, sampai R-1 node boleh mati tanpa ada file yang hilang dari daftar
+        if len(failed) >= self.ring.replicas:
+            return dict(status='ERROR', data=f"node tidak merespons: {failed}")
+        merged = set()
+        for response in responses:
+            if response.get('status') == 'OK':
+                merged.update(response['data'])
+        return dict(status='OK', data=sorted(merged))
+
+    def fetch_file_list(self):
+        response = self.send_request("LIST")
+        if response["status"] == "OK":
+            return True, response["data"]
+        return False, response.get("data", "Unknown failure")
+
+    def fetch_server_stats(self):
+        """Counter semua node dijumlahkan (perintah STATS)"""
+        response = self.send_request("STATS")
+        if response.get("status") != "OK":
+            return False, response.get("data", "Unknown failure")
+        totals = dict(success=0, fail=0)
+        for data in response["data"].values():
+            for key in totals:
+                totals[key] += data.get(key, 0)
+        return True, totals
+
+    def download_file(self, filename):
+        """Hasil: (sukses, durasi, ukuran, record timing per request)"""
+        result = (False, 0, 0, RequestTimer("download").finish(False, error="tidak ada node pemilik"))
+        for client in self._owners(filename):
+            result = client.download_file(filename)
+            if result[0]:
+                break
+        return result
+
+    def upload_file(self, filepath):
+        """Upload ke semua replika; sukses hanya bila semua replika sukses"""
+        start = time.time()
+        # nama yang dipakai untuk routing juga nama yang dikirim ke server
+        name = os.path.basename(filepath)
+        results = self._fanout(lambda client: client.upload_file(filepath, name), self._owners(name))
+        failed = [r for r in results if not r[0]]
+        if failed:
+            return failed[0]
+        ok, _, size, record = results[0]
+        return ok, time.time() - start, size, record
+
+    def delete_file(self, filename):
+        response = self.send_request(f"DELETE {filename}")
+        return response.get("status") == "OK", response.get("data")
+
+
+def plan_rebalance(ring, listings):
+    """Langkah pemindahan: (file, sumber, node yang belum punya, node yang harus melepas)"""
+    holders = {}
+    for node, names in listings.items():
+        for name in names:
+            holders.setdefault(name, []).append(node)
+    moves = []
+    for name in sorted(holders):
+        owners = ring.owners(name)
+        missing = [node for node in owners if node not in holders[name]]
+        extra = [node for node in holders[name] if node not in owners]
+        if missing or extra:
+            # salin dari pemilik yang sudah benar bila ada, supaya node yang dikosongkan tidak jadi hambatan
+            source = next((n for n in holders[name] if n in owners), holders[name][0])
+            moves.append((name, source, missing, extra))
+    return moves
+
+
+class Rebalancer:
+    """Memindahkan file supaya setiap node hanya menyimpan file miliknya di ring"""
+    def __init__(self, nodes, replicas=1, drain=(), workdir=None, jobs=4):
+        self.nodes = list(dict.fromkeys(list(nodes) + list(drain)))
+        self.ring = HashRing([n for n in self.nodes if n not in drain], replicas)
+        self.clients = {node: FileTransferClient(*node) for node in self.nodes}
+        self.workdir = workdir
+        self.jobs = jobs
+        self.lock = threading.Lock()
+        self.counts = dict(copied=0, deleted=0, failed=0, bytes=0)
+
+    def listings(self):
+        result = {}
+        for node, client in self.clients.items():
+            ok, data = client.fetch_file_list()
+            if not ok:
+                raise RuntimeError(f"LIST gagal di {node_name(node)}: {data}")
+            result[node] = data
+        return result
+
+    def move(self, step):
+        name, source, missing, extra = step
+        ok, _, size, _ = self.clients[source].download_file(name)
+        copied = 0
+        if ok:
+            for node in missing:
+                if self.clients[node].upload_file(name)[0]:
+                    copied += 1
+        if os.path.exists(name):
+            os.remove(name)
+        complete = ok and copied == len(missing)
+        deleted = 0
+        if complete:
+            # node lama baru dilepas setelah semua pemilik baru memegang salinannya
+            for node in extra:
+                if self.clients[node].send_request(f"DELETE {name}").get("status") == "OK":
+                    deleted += 1
+        with self.lock:
+            self.counts['copied'] += copied
+            self.counts['deleted'] += deleted
+            self.counts['bytes'] += size * copied
+            if not complete or deleted < len(extra):
+                self.counts['failed'] += 1
+                logging.warning(f"[REBALANCE] {name} dari {node_name(source)} gagal dipindahkan")
+        return complete
+
+    def run(self, dry_run=False):
+        moves = plan_rebalance(self.ring, self.listings())
+        print(f"[INFO] {len(moves)} file perlu dipindahkan")
+        if dry_run:
+            for name, source, missing, extra in moves:
+                print(f"{name}: {node_name(source)} -> {[node_name(n) for n in missing]}, "
+                      f"lepas dari {[node_name(n) for n in extra]}")
+            return self.counts
+        # download_file menulis ke direktori kerja, jadi pindah ke direktori sementara
+        previous = os.getcwd()
+        with tempfile.TemporaryDirectory(dir=self.workdir) as staging:
+            os.chdir(staging)
+            try:
+                with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+                    list(pool.map(self.move, moves))
+            finally:
+                os.chdir(previous)
+        return self.counts
+
+
+def serve(count, base_port, root, variant='threadpool', workers=5):
+    """Jalankan beberapa instance server di localhost, masing-masing dengan storage sendiri"""
+    from file_protocol import FileProtocol
+    from file_server_threadpool import FileTransferThreadServer
+    from file_server import Server
+
+    servers = []
+    for i in range(count):
+        directory = os.path.join(root, f"node{i}")
+        os.makedirs(directory, exist_ok=True)
+        protocol = FileProtocol(directory=directory)
+        if variant == 'thread':
+            server = Server(ipaddress='127.0.0.1', port=base_port + i, protocol=protocol)
+            server.daemon = True
+            server.start()
+        else:
+            server = FileTransferThreadServer(host='127.0.0.1', port=base_port + i, thread_limit=workers,
+                                              protocol=protocol)
+            threading.Thread(target=server.run, daemon=True).start()
+        servers.append(server)
+    nodes = ",".join(f"127.0.0.1:{base_port + i}" for i in range(count))
+    print(f"[INFO] {count} node aktif, storage di {root}")
+    print(f"[INFO] FILE_CLUSTER_NODES={nodes}")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        for server in servers:
+            server.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mode cluster file server (consistent hashing)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = sub.add_parser("serve", help="Beberapa instance server di localhost")
+    serve_parser.add_argument("--count", type=int, default=3)
+    serve_parser.add_argument("--base-port", type=int, default=7800)
+    serve_parser.add_argument("--root", default="cluster")
+    serve_parser.add_argument("--variant", choices=["threadpool", "thread"], default="threadpool")
+    serve_parser.add_argument("--workers", type=int, default=5)
+
+    for name in ("list", "stats", "get", "upload", "delete", "owners", "rebalance"):
+        command_parser = sub.add_parser(name)
+        command_parser.add_argument("--nodes", help="host:port,... atau file daftar node")
+        command_parser.add_argument("--replicas", type=int)
+        if name in ("get", "upload", "delete", "owners"):
+            command_parser.add_argument("filename")
+        if name == "rebalance":
+            command_parser.add_argument("--drain", default="", help="Node yang dikosongkan sebelum dilepas")
+            command_parser.add_argument("--jobs", type=int, default=4)
+            command_parser.add_argument("--workdir", help="Direktori sementara untuk file yang dipindahkan")
+            command_parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    if args.command == "serve":
+        serve(args.count, args.base_port, args.root, args.variant, args.workers)
+        sys.exit(0)
+
+    nodes = load_nodes(args.nodes)
+    replicas = args.replicas or int(os.environ.get('FILE_CLUSTER_REPLICAS', 1))
+    if args.command == "rebalance":
+        drain = [parse_node(n) for n in args.drain.split(',') if n.strip()]
+        counts = Rebalancer(nodes, replicas, drain, args.workdir, args.jobs).run(args.dry_run)
+        print(f"[INFO] disalin {counts['copied']}, dihapus {counts['deleted']}, "
+              f"gagal {counts['failed']}, {counts['bytes'] / 1024 / 1024:.2f} MB")
+        sys.exit(1 if counts['failed'] else 0)
+
+    client = ClusterFileTransferClient(nodes, replicas)
+    if args.command == "owners":
+        print(", ".join(node_name(n) for n in client.ring.owners(os.path.basename(args.filename))))
+        sys.exit(0)
+    if args.command == "list":
+        ok, data = client.fetch_file_list()
+    elif args.command == "stats":
+        ok, data = client.fetch_server_stats()
+    elif args.command == "get":
+        ok, data = client.download_file(args.filename)[0], args.filename
+    elif args.command == "upload":
+        ok, data = client.upload_file(args.filename)[0], args.filename
+    else:
+        ok, data = client.delete_file(args.filename)
+    print(data if ok else f"[ERROR] {data}")
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,176 @@
+import os
+import re
+import csv
+import argparse
+
+from latency_stats import welch_t_test
+
+"""
+* membandingkan dua kumpulan hasil stress test (skema CSV stress test)
+
+* baris dicocokkan per case (varian, operasi, volume, client worker, server
+  worker); beberapa baris dengan case yang sama dianggap run berulang
+* bila kedua sisi punya >= 2 run, perubahan dinilai dengan uji t Welch;
+  bila salah satu hanya punya satu run (seperti baseline di csv/), dipakai
+  ambang perubahan relatif
+"""
+
+# metrik: nama kolom -> True bila nilai lebih besar lebih baik
+METRICS = {
+    'throughput': True,
+    'total_time': False,
+    'latency_p50_ms': False,
+    'latency_p99_ms': False,
+}
+VARIANT_PREFIXES = {'tp': 'threadpool', 'pp': 'processpool', 'th': 'thread'}
+COMPARE_COLUMNS = ['variant', 'operation', 'volume', 'client_workers', 'server_workers', 'metric',
+                   'baseline_runs', 'baseline_mean', 'candidate_runs', 'candidate_mean', 'change_pct',
+                   'p_value', 'verdict']
+
+
+def csv_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if name.endswith('.csv'):
+                    yield os.path.join(path, name)
+        else:
+            yield path
+
+
+def file_labels(path):
+    """Tebak varian dan jumlah server worker dari nama file, mis. stress_test_pp50.csv"""
+    match = re.search(r'(tp|pp|th)(\d+)', os.path.basename(path))
+    if not match:
+        return '', ''
+    return VARIANT_PREFIXES[match.group(1)], match.group(2)
+
+
+def load_results(paths, variant=None):
+    """Kelompokkan baris hasil per case: {key: [row, ...]}"""
+    cases = {}
+    for path in csv_files(paths):
+        guessed_variant, guessed_workers = file_labels(path)
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                if not row.get('operation'):
+                    continue
+                key = (
+                    variant or row.get('variant') or guessed_variant,
+                    row['operation'],
+                    row['volume'].strip(),
+                    str(row['client_workers']).strip(),
+                    str(row.get('server_workers') or guessed_workers).strip(),
+                )
+                cases.setdefault(key, []).append(row)
+    return cases
+
+
+def metric_values(rows, column):
+    values = []
+    for row in rows:
+        try:
+            values.append(float(row[column]))
+        except (KeyError, TypeError, ValueError):
+            pass
+    return values
+
+
+def compare_metric(baseline, candidate, higher_is_better, alpha, threshold):
+    """Hasil (change_pct, p_value, verdict) untuk satu metrik satu case"""
+    base_mean = sum(baseline) / len(baseline)
+    cand_mean = sum(candidate) / len(candidate)
+    change = (cand_mean - base_mean) / base_mean * 100 if base_mean else None
+    worse = cand_mean < base_mean if higher_is_better else cand_mean > base_mean
+
+    test = welch_t_test(baseline, candidate)
+    if test is not None:
+        p_value = test[2]
+        significant = p_value < alpha
+    else:
+        # satu run saja: tidak ada varians, pakai ambang perubahan relatif
+        p_value = None
+        significant = change is not None and abs(change) >= threshold
+    if not significant or cand_mean == base_mean:
+        verdict = 'same'
+    else:
+        verdict = 'REGRESSION' if worse else 'improved'
+    return change, p_value, verdict
+
+
+def compare(baseline_cases, candidate_cases, alpha=0.05, threshold=10.0):
+    rows = []
+    for key in sorted(set(baseline_cases) | set(candidate_cases)):
+        case = dict(zip(('variant', 'operation', 'volume', 'client_workers', 'server_workers'), key))
+        if key not in candidate_cases or key not in baseline_cases:
+            rows.append(dict(case, metric='', verdict='baseline only' if key in baseline_cases else 'candidate only'))
+            continue
+        for column, higher_is_better in METRICS.items():
+            baseline = metric_values(baseline_cases[key], column)
+            candidate = metric_values(candidate_cases[key], column)
+            if not baseline or not candidate:
+                continue
+            change, p_value, verdict = compare_metric(baseline, candidate, higher_is_better, alpha, threshold)
+            rows.append(dict(
+                case,
+                metric=column,
+                baseline_runs=len(baseline),
+                baseline_mean=round(sum(baseline) / len(baseline), 3),
+                candidate_runs=len(candidate),
+                candidate_mean=round(sum(candidate) / len(candidate), 3),
+                change_pct=round(change, 1) if change is not None else '',
+                p_value=round(p_value, 4) if p_value is not None else '',
+                verdict=verdict,
+            ))
+    return rows
+
+
+def print_table(rows):
+    header = f"{'variant':<12}{'operation':<10}{'volume':>8}{'cw':>5}{'sw':>5}  {'metric':<16}" \
+             f"{'baseline':>11}{'candidate':>11}{'change':>9}{'p':>8}  verdict"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        if not row['metric']:
+            print(f"{row['variant']:<12}{row['operation']:<10}{row['volume']:>8}{row['client_workers']:>5}"
+                  f"{row['server_workers']:>5}  {'':<16}{'':>11}{'':>11}{'':>9}{'':>8}  {row['verdict']}")
+            continue
+        change = f"{row['change_pct']:+.1f}%" if row['change_pct'] != '' else ''
+        p_value = f"{row['p_value']:.3f}" if row['p_value'] != '' else '-'
+        print(f"{row['variant']:<12}{row['operation']:<10}{row['volume']:>8}{row['client_workers']:>5}"
+              f"{row['server_workers']:>5}  {row['metric']:<16}{row['baseline_mean']:>11}{row['candidate_mean']:>11}"
+              f"{change:>9}{p_value:>8}  {row['verdict']}")
+
+    verdicts = [r['verdict'] for r in rows if r['metric']]
+    print(f"\nRegresi: {verdicts.count('REGRESSION')} | Membaik: {verdicts.count('improved')} | "
+          f"Tidak berubah: {verdicts.count('same')} | Tanpa pasangan: {len(rows) - len(verdicts)}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bandingkan hasil stress test baru terhadap baseline")
+    parser.add_argument("--baseline", nargs="+", default=["csv"], help="File/direktori CSV baseline")
+    parser.add_argument("--candidate", nargs="+", required=True, help="File/direktori CSV hasil baru")
+    parser.add_argument("--baseline-variant", help="Paksa label varian untuk semua baris baseline")
+    parser.add_argument("--candidate-variant", help="Paksa label varian untuk semua baris kandidat")
+    parser.add_argument("--alpha", type=float, default=0.05, help="Tingkat signifikansi uji t Welch")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Ambang perubahan (%%) bila salah satu sisi hanya punya satu run")
+    parser.add_argument("--matched-only", action="store_true", help="Sembunyikan case yang tidak punya pasangan")
+    parser.add_argument("--output", help="Simpan tabel perbandingan ke CSV")
+    args = parser.parse_args()
+
+    baseline_cases = load_results(args.baseline, args.baseline_variant)
+    candidate_cases = load_results(args.candidate, args.candidate_variant)
+    rows = compare(baseline_cases, candidate_cases, args.alpha, args.threshold)
+    if args.matched_only:
+        rows = [r for r in rows if r['metric']]
+    print_table(rows)
+
+    if args.output:
+        with open(args.output, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=COMPARE_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"[INFO] Comparison exported to {args.output}")
+
+    exit(1 if any(r['verdict'] == 'REGRESSION' for r in rows) else 0)
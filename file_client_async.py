@@ -0,0 +1,315 @@
+import asyncio
+import json
+import base64
+import logging
+import os
+import time
+import argparse
+
+from stream_codec import GetResponseParser, encode_file_chunks, RECV_CHUNK
+from latency_stats import RequestTimer, summarize
+
+"""
+* semua I/O file lokal (open, read, write, close) dijalankan di thread lewat
+  asyncio.to_thread, supaya download/upload file besar tidak menahan event
+  loop dan coroutine lain tetap berjalan
+* potongan dari socket dikumpulkan dulu sampai DISK_CHUNK sebelum ditulis,
+  agar jumlah perpindahan ke thread tetap sedikit
+"""
+
+DISK_CHUNK = 1024 * 1024
+
+
+def read_file(path):
+    with open(path, "rb") as in_file:
+        return in_file.read()
+
+
+class AsyncFileTransferClient:
+    """Versi asyncio dari FileTransferClient.
+
+    Satu event loop bisa menjalankan ribuan koneksi sekaligus, jadi load
+    generator tidak perlu satu thread/proses per client.
+    """
+    def __init__(self, host, port):
+        self.target = (host, port)
+        self.timeout_duration = 300
+        # batas buffer StreamReader; respons LIST dengan banyak file bisa besar
+        self.stream_limit = 64 * 1024 * 1024
+
+    async def _connect(self):
+        return await asyncio.wait_for(
+            asyncio.open_connection(*self.target, limit=self.stream_limit), self.timeout_duration)
+
+    async def _close(self, writer):
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except Exception:
+            pass
+
+    async def _receive_response(self, reader, timer=None):
+        if timer:
+            # tunggu byte pertama dulu agar TTFB bisa dicatat
+            first = await reader.read(1)
+            timer.mark_first_byte()
+            if not first:
+                raise ConnectionError("koneksi ditutup server")
+            received = first + await reader.readuntil(b"\r\n\r\n")
+        else:
+            received = await reader.readuntil(b"\r\n\r\n")
+        return json.loads(received[:-4].decode())
+
+    async def send_request(self, command, timer=None):
+        writer = None
+        try:
+            reader, writer = await self._connect()
+            if timer:
+                timer.mark_connected()
+            writer.write((command + "\r\n\r\n").encode())
+            await writer.drain()
+            if timer:
+                timer.mark_sent()
+            return await asyncio.wait_for(self._receive_response(reader, timer), self.timeout_duration)
+        except Exception as err:
+            return {"status": "ERROR", "data": str(err)}
+        finally:
+            if writer is not None:
+                await self._close(writer)
+
+    async def fetch_file_list(self):
+        response = await self.send_request("LIST")
+        if response["status"] == "OK":
+            return True, response["data"]
+        return False, response.get("data", "Unknown failure")
+
+    async def download_file(self, filename, destination="."):
+        """Hasil: (sukses, durasi, ukuran, record timing per request)"""
+        start = time.time()
+        timer = RequestTimer("download")
+        writer = None
+        parser = GetResponseParser(lambda fname: os.path.join(destination, fname))
+        try:
+            reader, writer = await self._connect()
+            timer.mark_connected()
+            # path lokal (mis. dari manifest corpus) tidak berlaku di server
+            writer.write(f"GET {os.path.basename(filename)}\r\n\r\n".encode())
+            await writer.drain()
+            timer.mark_sent()
+            pending = bytearray()
+            while not parser.done:
+                chunk = await asyncio.wait_for(reader.read(RECV_CHUNK), self.timeout_duration)
+                if not chunk:
+                    if pending:
+                        await asyncio.to_thread(parser.feed, bytes(pending))
+                    break
+                timer.mark_first_byte()
+                pending += chunk
+                # tanda kutip muncul di header JSON dan di akhir data_file (base64 tidak
+                # pernah berisi kutip), jadi potongan itu langsung diumpan ke parser
+                if len(pending) >= DISK_CHUNK or b'"' in chunk:
+                    await asyncio.to_thread(parser.feed, bytes(pending))
+                    pending.clear()
+
+            if parser.done and parser.response.get("status") == "OK":
+                return True, time.time() - start, parser.size, timer.finish(True, parser.size)
+            error = parser.response.get("data") if parser.response else "respons tidak lengkap"
+            return False, 0, 0, timer.finish(False, error=error)
+        except Exception as err:
+            return False, 0, 0, timer.finish(False, error=err)
+        finally:
+            await asyncio.to_thread(parser.abort)
+            if writer is not None:
+                await self._close(writer)
+
+    async def upload_file(self, filepath):
+        """Hasil: (sukses, durasi, ukuran, record timing per request)"""
+        start = time.time()
+        timer = RequestTimer("upload")
+        if not os.path.isfile(filepath):
+            return False, 0, 0, timer.finish(False, error="file tidak ditemukan")
+
+        writer = None
+        try:
+            file_size = os.path.getsize(filepath)
+            reader, writer = await self._connect()
+            timer.mark_connected()
+            writer.write(f"UPLOAD {os.path.basename(filepath)} ".encode())
+            in_file = await asyncio.to_thread(open, filepath, "rb")
+            try:
+                chunks = encode_file_chunks(in_file)
+                while True:
+                    encoded_chunk = await asyncio.to_thread(next, chunks, None)
+                    if encoded_chunk is None:
+                        break
+                    writer.write(encoded_chunk)
+                    await writer.drain()
+            finally:
+                await asyncio.to_thread(in_file.close)
+            writer.write(b"\r\n\r\n")
+            await writer.drain()
+            timer.mark_sent()
+
+            response = await asyncio.wait_for(self._receive_response(reader, timer), self.timeout_duration)
+            if response.get("status") == "OK":
+                return True, time.time() - start, file_size, timer.finish(True, file_size)
+            return False, 0, 0, timer.finish(False, error=response.get("data"))
+        except Exception as err:
+            return False, 0, 0, timer.finish(False, error=err)
+        finally:
+            if writer is not None:
+                await self._close(writer)
+
+    async def download_many(self, names, destination="."):
+        start = time.time()
+        writer = None
+        total_bytes = 0
+        try:
+            reader, writer = await self._connect()
+            writer.write(("MGET " + " ".join(names) + "\r\n\r\n").encode())
+            await writer.drain()
+            response = await asyncio.wait_for(self._receive_response(reader), self.timeout_duration)
+            if response.get("status") != "OK":
+                return False, 0, 0
+
+            received = 0
+            for _ in range(response["count"]):
+                size, fname = (await reader.readline()).decode().rstrip("\n").split(" ", 1)
+                size = int(size)
+                if size < 0:
+                    continue
+                out_file = await asyncio.to_thread(open, os.path.join(destination, os.path.basename(fname)), "wb")
+                try:
+                    remaining = size
+                    pending = bytearray()
+                    while remaining > 0:
+                        chunk = await reader.read(min(RECV_CHUNK, remaining))
+                        if not chunk:
+                            raise ConnectionError("koneksi terputus di tengah record")
+                        pending += chunk
+                        remaining -= len(chunk)
+                        if len(pending) >= DISK_CHUNK or remaining == 0:
+                            await asyncio.to_thread(out_file.write, bytes(pending))
+                            pending.clear()
+                finally:
+                    await asyncio.to_thread(out_file.close)
+                received += 1
+                total_bytes += size
+
+            return received == response["count"], time.time() - start, total_bytes
+        except Exception:
+            return False, 0, 0
+        finally:
+            if writer is not None:
+                await self._close(writer)
+
+    async def upload_many(self, filepaths):
+        start = time.time()
+        try:
+            parts = []
+            total_bytes = 0
+            for filepath in filepaths:
+                content = await asyncio.to_thread(read_file, filepath)
+                parts.append(f"{os.path.basename(filepath)} {base64.b64encode(content).decode()}")
+                total_bytes += len(content)
+
+            response = await self.send_request("MUPLOAD " + " ".join(parts))
+            if response.get("status") == "OK":
+                return True, time.time() - start, total_bytes
+            return False, 0, 0
+        except Exception:
+            return False, 0, 0
+
+    async def delete_many(self, names):
+        response = await self.send_request("MDELETE " + " ".join(names))
+        if response.get("status") == "OK":
+            return True, response["data"]
+        return False, response.get("data", "Unknown failure")
+
+
+async def execute_task(client, job):
+    action, filename = job
+    if action == "download":
+        return await client.download_file(filename)
+    elif action == "upload":
+        return await client.upload_file(filename)
+    elif action == "list":
+        timer = RequestTimer("list")
+        response = await client.send_request("LIST", timer)
+        ok = response.get("status") == "OK"
+        return ok, 0, 0, timer.finish(ok, error=response.get("data"))
+    return False, 0, 0, None
+
+
+async def run_stress_test(ip, port, action, file, worker_count):
+    client = AsyncFileTransferClient(ip, port)
+    # file boleh berupa daftar (group dari manifest corpus); client ke-i memakai file ke-i
+    files = file if isinstance(file, list) else [file]
+    job_list = [(action, files[i % len(files)]) for i in range(worker_count)]
+
+    start = time.time()
+    outcome = await asyncio.gather(*(execute_task(client, job) for job in job_list))
+    duration = time.time() - start
+
+    successful = sum(1 for r in outcome if r[0])
+    failed = len(outcome) - successful
+
+    if action in ["download", "upload"] and successful > 0:
+        total_bytes = sum(r[2] for r in outcome if r[0])
+        rate = total_bytes / duration
+    else:
+        rate = 0
+
+    return {
+        "operation": action,
+        "file_size": os.path.getsize(files[0]) if files[0] and os.path.exists(files[0]) else 0,
+        "num_workers": worker_count,
+        "total_time": duration,
+        "throughput": rate,
+        "successes": successful,
+        "failures": failed,
+        "requests": [r[3] for r in outcome]
+    }
+
+
+def raise_fd_limit():
+    """Naikkan batas file descriptor ke batas hard agar ribuan koneksi muat"""
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if soft < hard:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    except (ImportError, ValueError, OSError):
+        pass
+
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument("--server-ip", default="172.16.16.101")
+    arg_parser.add_argument("--server-port", type=int, default=7778)
+    arg_parser.add_argument("--operation", choices=["download", "upload", "list"], required=True)
+    arg_parser.add_argument("--filename")
+    arg_parser.add_argument("--workers", type=int, default=5)
+    args = arg_parser.parse_args()
+
+    if args.operation in ["download", "upload"] and not args.filename:
+        print("Filename must be specified for upload/download operations.")
+        exit(1)
+
+    logging.basicConfig(level=logging.WARNING)
+    raise_fd_limit()
+    stats = asyncio.run(run_stress_test(args.server_ip, args.server_port, args.operation, args.filename, args.workers))
+
+    print("\n--- Stress Test Report ---")
+    print(f"Operation   : {stats['operation']}")
+    if args.operation in ["download", "upload"]:
+        print(f"File Size   : {stats['file_size'] / 1024 / 1024:.2f} MB")
+    print(f"Workers     : {stats['num_workers']}")
+    print(f"Total Time  : {stats['total_time']:.2f} seconds")
+    if args.operation in ["download", "upload"]:
+        print(f"Throughput  : {stats['throughput'] / 1024 / 1024:.2f} MB/s")
+    print(f"Successes   : {stats['successes']}")
+    print(f"Failures    : {stats['failures']}")
+    latency = summarize(stats['requests'])
+    if latency['max'] is not None:
+        print(f"Latency     : p50 {latency['p50']:.1f} / p90 {latency['p90']:.1f} / p99 {latency['p99']:.1f} / max {latency['max']:.1f} ms")
@@ -1,8 +1,27 @@
 import socket
 import json
-import base64
 import logging
 import os
+import sys
+import time
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from stream_codec import GetResponseParser, encode_file_chunks, RECV_CHUNK
+
+"""
+* sync: menyamakan isi direktori lokal dengan server tanpa menu interaktif
+  python file_client_cli.py sync push <direktori> [--server host:port] [--jobs 4]
+  python file_client_cli.py sync pull <direktori> [--check hash|mtime|size] [--delete] [--dry-run]
+
+* daftar server diambil dengan INFO (ukuran, mtime); file yang ukurannya
+  sama baru dibandingkan sha256-nya (INFO HASH), sehingga hanya file yang
+  benar-benar berubah yang dikirim
+* pull menyalin mtime server ke file lokal, jadi --check mtime tepat untuk
+  pull berikutnya; untuk push, mtime server adalah waktu upload
+"""
 
 server_address=('0.0.0.0',7777)
 
@@ -13,6 +32,9 @@ def send_command(command_str=""):
     logging.warning(f"connecting to {server_address}")
     try:
         logging.warning(f"sending message ")
+        # server memisah request dengan \r\n\r\n, bukan dari ukuran recv
+        if not command_str.endswith("\r\n\r\n"):
+            command_str += "\r\n\r\n"
         sock.sendall(command_str.encode())
         # Look for the response, waiting until socket is done (no more data)
         data_received="" #empty string
@@ -48,16 +70,36 @@ def remote_list():
         print("Gagal")
         return False
 
+def receive_json(sock):
+    data_received=b""
+    while True:
+        data = sock.recv(RECV_CHUNK)
+        if not data:
+            break
+        data_received += data
+        if b"\r\n\r\n" in data_received:
+            break
+    return json.loads(data_received.split(b"\r\n\r\n")[0].decode())
+
 def remote_get(filename=""):
-    command_str=f"GET {filename}"
-    hasil = send_command(command_str)
-    if (hasil['status']=='OK'):
-        #proses file dalam bentuk base64 ke bentuk bytes
-        namafile= hasil['data_namafile']
-        isifile = base64.b64decode(hasil['data_file'])
-        fp = open(namafile,'wb+')
-        fp.write(isifile)
-        fp.close()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    #isi file base64 didekode per potongan dan langsung ditulis ke disk
+    parser = GetResponseParser(lambda namafile: namafile)
+    try:
+        sock.connect(server_address)
+        sock.sendall(f"GET {filename}\r\n\r\n".encode())
+        while not parser.done:
+            data = sock.recv(RECV_CHUNK)
+            if not data:
+                break
+            parser.feed(data)
+    except Exception as e:
+        logging.warning(f"error during data receiving: {e}")
+    finally:
+        parser.abort()
+        sock.close()
+
+    if parser.done and parser.response['status']=='OK':
         return True
     else:
         print("Gagal")
@@ -68,14 +110,17 @@ def upload_file_to_server(filepath=""):
         print(f"File '{filepath}' tidak ditemukan.")
         return False
 
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
     try:
-        with open(filepath, 'rb') as file:
-            encoded_file = base64.b64encode(file.read()).decode()
-
         filename_only = os.path.basename(filepath)
-        command = f"UPLOAD {filename_only} {encoded_file}"
+        sock.connect(server_address)
+        sock.sendall(f"UPLOAD {filename_only} ".encode())
+        with open(filepath, 'rb') as file:
+            for encoded_chunk in encode_file_chunks(file):
+                sock.sendall(encoded_chunk)
+        sock.sendall(b"\r\n\r\n")
 
-        response = send_command(command)
+        response = receive_json(sock)
 
         if response and response.get('status') == 'OK':
             print(response['data'])
@@ -86,6 +131,8 @@ def upload_file_to_server(filepath=""):
     except Exception as e:
         print(f"Error saat upload: {str(e)}")
         return False
+    finally:
+        sock.close()
 
 def delete_file_from_server(filename=""):
     command = f"DELETE {filename}"
@@ -98,8 +145,225 @@ def delete_file_from_server(filename=""):
         print(f"Gagal: {response.get('data', 'Unknown error')}")
         return False
 
+
+SYNC_CHECKS = ('hash', 'mtime', 'size')
+INFO_BATCH = 500
+HASH_CHUNK = 1024 * 1024
+
+
+def request_json(address, command):
+    sock = socket.create_connection(address)
+    try:
+        sock.sendall((command + "\r\n\r\n").encode())
+        return receive_json(sock)
+    finally:
+        sock.close()
+
+
+def remote_info(address, names=None, with_hash=False):
+    """{nama: entry INFO} dari server; nama diminta per batch supaya request tidak terlalu besar"""
+    prefix = "INFO HASH" if with_hash else "INFO"
+    batches = [names[i:i + INFO_BATCH] for i in range(0, len(names), INFO_BATCH)] if names is not None else [[]]
+    result = {}
+    for batch in batches:
+        response = request_json(address, " ".join([prefix] + batch))
+        if response.get('status') != 'OK':
+            raise RuntimeError(response.get('data', 'INFO gagal'))
+        result.update({entry['namafile']: entry for entry in response['data']})
+    return result
+
+
+def local_info(directory):
+    result = {}
+    for entry in os.scandir(directory):
+        if not entry.is_file():
+            continue
+        if '.' not in entry.name[1:] or entry.name.startswith('.') or ' ' in entry.name:
+            # server hanya menampilkan nama berekstensi dan protokol memisah parameter dengan spasi
+            logging.warning(f"{entry.name} dilewati: nama file tidak didukung server")
+            continue
+        stat = entry.stat()
+        result[entry.name] = dict(namafile=entry.name, size=stat.st_size, mtime=stat.st_mtime)
+    return result
+
+
+def local_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fp:
+        for chunk in iter(lambda: fp.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def push_file(address, path):
+    sock = socket.create_connection(address)
+    try:
+        sock.sendall(f"UPLOAD {os.path.basename(path)} ".encode())
+        with open(path, 'rb') as file:
+            for encoded_chunk in encode_file_chunks(file):
+                sock.sendall(encoded_chunk)
+        sock.sendall(b"\r\n\r\n")
+        response = receive_json(sock)
+        return response.get('status') == 'OK', response.get('data')
+    finally:
+        sock.close()
+
+
+def pull_file(address, name, directory, mtime=None):
+    """Download lewat file sementara (GetResponseParser), supaya file lokal tidak pernah setengah jadi"""
+    target = os.path.join(directory, name)
+    parser = GetResponseParser(lambda namafile: target)
+    sock = socket.create_connection(address)
+    try:
+        sock.sendall(f"GET {name}\r\n\r\n".encode())
+        while not parser.done:
+            data = sock.recv(RECV_CHUNK)
+            if not data:
+                break
+            parser.feed(data)
+    finally:
+        parser.abort()
+        sock.close()
+    if not (parser.done and parser.response.get('status') == 'OK'):
+        return False, parser.response.get('data') if parser.done else 'respons tidak lengkap'
+    if mtime is not None:
+        os.utime(target, (mtime, mtime))
+    return True, None
+
+
+class DirectorySync:
+    def __init__(self, address, directory, direction, jobs=4, check='hash', delete=False, dry_run=False):
+        self.address = address
+        self.directory = directory
+        self.direction = direction
+        self.jobs = jobs
+        self.check = check
+        self.delete = delete
+        self.dry_run = dry_run
+        self.lock = threading.Lock()
+        self.summary = dict(transferred=0, transferred_bytes=0, skipped=0, skipped_bytes=0,
+                            failed=0, deleted=0, elapsed=0.0)
+
+    def unchanged(self, name, source, target, source_hashes, target_hashes):
+        if self.check == 'size':
+            return True
+        if self.check == 'mtime':
+            return target['mtime'] >= source['mtime']
+        return source_hashes.get(name) is not None and source_hashes.get(name) == target_hashes.get(name)
+
+    def plan(self):
+        """(daftar file yang dikirim, daftar file yang dihapus di sisi tujuan)"""
+        local = local_info(self.directory)
+        remote = remote_info(self.address)
+        source, target = (local, remote) if self.direction == 'push' else (remote, local)
+        same_size = [n for n in source if n in target and source[n]['size'] == target[n]['size']]
+        local_hashes, remote_hashes = {}, {}
+        if self.check == 'hash' and same_size:
+            remote_hashes = {n: e['sha256'] for n, e in remote_info(self.address, same_size, True).items()}
+            with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+                digests = pool.map(local_sha256, [os.path.join(self.directory, n) for n in same_size])
+                local_hashes = dict(zip(same_size, digests))
+        source_hashes, target_hashes = (local_hashes, remote_hashes) if self.direction == 'push' \
+            else (remote_hashes, local_hashes)
+
+        transfers = []
+        for name in sorted(source):
+            if name in same_size and self.unchanged(name, source[name], target[name], source_hashes, target_hashes):
+                self.summary['skipped'] += 1
+                self.summary['skipped_bytes'] += source[name]['size']
+            else:
+                transfers.append(source[name])
+        removals = sorted(n for n in target if n not in source) if self.delete else []
+        return transfers, removals
+
+    def transfer(self, entry):
+        name = entry['namafile']
+        try:
+            if self.direction == 'push':
+                ok, error = push_file(self.address, os.path.join(self.directory, name))
+            else:
+                ok, error = pull_file(self.address, name, self.directory, entry['mtime'])
+        except Exception as e:
+            ok, error = False, str(e)
+        with self.lock:
+            if ok:
+                self.summary['transferred'] += 1
+                self.summary['transferred_bytes'] += entry['size']
+            else:
+                self.summary['failed'] += 1
+                logging.warning(f"{self.direction} {name} gagal: {error}")
+
+    def remove(self, name):
+        try:
+            if self.direction == 'push':
+                response = request_json(self.address, f"DELETE {name}")
+                ok, error = response.get('status') == 'OK', response.get('data')
+            else:
+                os.remove(os.path.join(self.directory, name))
+                ok, error = True, None
+        except Exception as e:
+            ok, error = False, str(e)
+        with self.lock:
+            self.summary['deleted' if ok else 'failed'] += 1
+        if not ok:
+            logging.warning(f"hapus {name} gagal: {error}")
+
+    def run(self):
+        start = time.time()
+        os.makedirs(self.directory, exist_ok=True)
+        transfers, removals = self.plan()
+        if self.dry_run:
+            for entry in transfers:
+                print(f"{self.direction} {entry['namafile']} ({entry['size']} bytes)")
+            for name in removals:
+                print(f"hapus {name}")
+            self.summary['transferred'] = len(transfers)
+            self.summary['transferred_bytes'] = sum(e['size'] for e in transfers)
+            self.summary['deleted'] = len(removals)
+        else:
+            with ThreadPoolExecutor(max_workers=self.jobs) as pool:
+                list(pool.map(self.transfer, transfers))
+                list(pool.map(self.remove, removals))
+        self.summary['elapsed'] = time.time() - start
+        return self.summary
+
+
+def print_sync_summary(summary, dry_run=False):
+    mb = 1024 * 1024
+    label = "akan dikirim" if dry_run else "dikirim"
+    print(f"{label:<13}: {summary['transferred']} file, {summary['transferred_bytes'] / mb:.2f} MB")
+    print(f"{'dilewati':<13}: {summary['skipped']} file, {summary['skipped_bytes'] / mb:.2f} MB")
+    print(f"{'dihapus':<13}: {summary['deleted']} file")
+    print(f"{'gagal':<13}: {summary['failed']} file")
+    print(f"{'waktu':<13}: {summary['elapsed']:.2f} detik")
+    if not dry_run and summary['elapsed'] > 0:
+        print(f"{'throughput':<13}: {summary['transferred_bytes'] / mb / summary['elapsed']:.2f} MB/s")
+
+
+def sync_main(argv):
+    parser = argparse.ArgumentParser(prog="file_client_cli.py sync", description="Sinkronisasi direktori dengan server")
+    parser.add_argument("direction", choices=["push", "pull"])
+    parser.add_argument("directory")
+    parser.add_argument("--server", default=f"{server_address[0]}:{server_address[1]}", help="host:port")
+    parser.add_argument("--jobs", type=int, default=4, help="Jumlah koneksi bersamaan")
+    parser.add_argument("--check", choices=SYNC_CHECKS, default="hash",
+                        help="Pembanding file yang ukurannya sama (default: sha256)")
+    parser.add_argument("--delete", action="store_true", help="Hapus file di tujuan yang tidak ada di sumber")
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args(argv)
+
+    host, _, port = args.server.rpartition(':')
+    sync = DirectorySync((host, int(port)), args.directory, args.direction, args.jobs, args.check,
+                         args.delete, args.dry_run)
+    summary = sync.run()
+    print_sync_summary(summary, args.dry_run)
+    return 1 if summary['failed'] else 0
+
+
 if __name__ == '__main__':
     logging.basicConfig(level=logging.WARNING)
+    if len(sys.argv) > 1 and sys.argv[1] == 'sync':
+        sys.exit(sync_main(sys.argv[2:]))
 
     print("=" * 60)
     print("REMOTE FILE CLIENT".center(60))
@@ -1,94 +1,17 @@
-import socket
-import json
-import base64
 import logging
 import os
 import time
 from concurrent.futures import ProcessPoolExecutor, as_completed
 import argparse
 
-class FileTransferClient:
-    def __init__(self, host, port):
-        self.target = (host, port)
-        self.timeout_duration = 300  
-
-    def send_request(self, command):
-        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        sock.settimeout(self.timeout_duration)
-        try:
-            sock.connect(self.target)
-            sock.sendall((command + "\r\n\r\n").encode())
-
-            received = ""
-            while True:
-                chunk = sock.recv(1024 * 1024)
-                if chunk:
-                    received += chunk.decode()
-                    if "\r\n\r\n" in received:
-                        break
-                else:
-                    break
-
-            parsed = received.split("\r\n\r\n")[0]
-            return json.loads(parsed)
-        except Exception as err:
-            return {"status": "ERROR", "data": str(err)}
-        finally:
-            sock.close()
-
-    def fetch_file_list(self):
-        response = self.send_request("LIST")
-        if response["status"] == "OK":
-            return True, response["data"]
-        return False, response.get("data", "Unknown failure")
-
-    def download_file(self, filename):
-        start = time.time()
-        response = self.send_request(f"GET {filename}")
-        if response["status"] == "OK":
-            try:
-                fname = response["data_namafile"]
-                content = base64.b64decode(response["data_file"])
-                with open(fname, "wb+") as out_file:
-                    out_file.write(content)
-                duration = time.time() - start
-                return True, duration, os.path.getsize(fname)
-            except Exception:
-                return False, 0, 0
-        return False, 0, 0
-
-    def upload_file(self, filepath):
-        start = time.time()
-        if not os.path.isfile(filepath):
-            return False, 0, 0
-
-        try:
-            with open(filepath, "rb") as in_file:
-                file_size = os.path.getsize(filepath)
-                encoded_data = base64.b64encode(in_file.read()).decode()
-
-            response = self.send_request(f"UPLOAD {filepath} {encoded_data}")
-            duration = time.time() - start
-
-            if response and response.get("status") == "OK":
-                return True, duration, file_size
-            return False, 0, 0
-        except Exception:
-            return False, 0, 0
-
-def execute_task(client, job):
-    action, filename = job
-    if action == "download":
-        return client.download_file(filename)
-    elif action == "upload":
-        return client.upload_file(filename)
-    elif action == "list":
-        return client.fetch_file_list()[0], 0, 0
-    return False, 0, 0
+from file_client_threadpool import FileTransferClient, execute_task
+from latency_stats import summarize
 
 def run_stress_test(ip, port, action, file, worker_count):
     client = FileTransferClient(ip, port)
-    job_list = [(action, file) for _ in range(worker_count)]
+    # file boleh berupa daftar (group dari manifest corpus); client ke-i memakai file ke-i
+    files = file if isinstance(file, list) else [file]
+    job_list = [(action, files[i % len(files)]) for i in range(worker_count)]
 
     start = time.time()
     outcome = []
@@ -110,12 +33,13 @@ def run_stress_test(ip, port, action, file, worker_count):
 
     return {
         "operation": action,
-        "file_size": os.path.getsize(file) if file and os.path.exists(file) else 0,
+        "file_size": os.path.getsize(files[0]) if files[0] and os.path.exists(files[0]) else 0,
         "num_workers": worker_count,
         "total_time": duration,
         "throughput": rate,
         "successes": successful,
-        "failures": failed
+        "failures": failed,
+        "requests": [r[3] for r in outcome]
     }
 
 if __name__ == "__main__":
@@ -143,4 +67,7 @@ if __name__ == "__main__":
     if args.operation in ["download", "upload"]:
         print(f"Throughput  : {stats['throughput'] / 1024 / 1024:.2f} MB/s")
     print(f"Successes   : {stats['successes']}")
-    print(f"Failures    : {stats['failures']}")
\ No newline at end of file
+    print(f"Failures    : {stats['failures']}")
+    latency = summarize(stats['requests'])
+    if latency['max'] is not None:
+        print(f"Latency     : p50 {latency['p50']:.1f} / p90 {latency['p90']:.1f} / p99 {latency['p99']:.1f} / max {latency['max']:.1f} ms")
\ No newline at end of file
@@ -7,75 +7,201 @@ import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import argparse
 
+from stream_codec import GetResponseParser, encode_file_chunks, RECV_CHUNK
+from latency_stats import RequestTimer, summarize
+
 class FileTransferClient:
     def __init__(self, host, port):
         self.target = (host, port)
         self.timeout_duration = 300  
 
-    def send_request(self, command):
+    def send_request(self, command, timer=None):
         sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         sock.settimeout(self.timeout_duration)
         try:
             sock.connect(self.target)
+            if timer:
+                timer.mark_connected()
             sock.sendall((command + "\r\n\r\n").encode())
-
-            received = ""
-            while True:
-                chunk = sock.recv(1024 * 1024)
-                if chunk:
-                    received += chunk.decode()
-                    if "\r\n\r\n" in received:
-                        break
-                else:
-                    break
-
-            parsed = received.split("\r\n\r\n")[0]
-            return json.loads(parsed)
+            if timer:
+                timer.mark_sent()
+            return self._receive_response(sock, timer)
         except Exception as err:
             return {"status": "ERROR", "data": str(err)}
         finally:
             sock.close()
 
+    def _receive_response(self, sock, timer=None):
+        received = b""
+        while True:
+            chunk = sock.recv(1024 * 1024)
+            if chunk:
+                if timer:
+                    timer.mark_first_byte()
+                received += chunk
+                if b"\r\n\r\n" in received:
+                    break
+            else:
+                break
+
+        parsed = received.split(b"\r\n\r\n")[0]
+        return json.loads(parsed.decode())
+
     def fetch_file_list(self):
         response = self.send_request("LIST")
         if response["status"] == "OK":
             return True, response["data"]
         return False, response.get("data", "Unknown failure")
 
+    def fetch_server_stats(self):
+        """Counter request sukses/gagal versi server (perintah STATS)"""
+        response = self.send_request("STATS")
+        if response.get("status") == "OK":
+            return True, response["data"]
+        return False, response.get("data", "Unknown failure")
+
     def download_file(self, filename):
+        """Hasil: (sukses, durasi, ukuran, record timing per request)"""
         start = time.time()
-        response = self.send_request(f"GET {filename}")
-        if response["status"] == "OK":
-            try:
-                fname = response["data_namafile"]
-                content = base64.b64decode(response["data_file"])
-                with open(fname, "wb+") as out_file:
-                    out_file.write(content)
+        timer = RequestTimer("download")
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout_duration)
+        parser = GetResponseParser(lambda fname: fname)
+        try:
+            sock.connect(self.target)
+            timer.mark_connected()
+            # path lokal (mis. dari manifest corpus) tidak berlaku di server
+            sock.sendall(f"GET {os.path.basename(filename)}\r\n\r\n".encode())
+            timer.mark_sent()
+            # isi file didekode per potongan dan langsung ditulis ke disk
+            while not parser.done:
+                chunk = sock.recv(RECV_CHUNK)
+                if not chunk:
+                    break
+                timer.mark_first_byte()
+                parser.feed(chunk)
+
+            if parser.done and parser.response.get("status") == "OK":
                 duration = time.time() - start
-                return True, duration, os.path.getsize(fname)
-            except Exception:
-                return False, 0, 0
-        return False, 0, 0
+                return True, duration, parser.size, timer.finish(True, parser.size)
+            error = parser.response.get("data") if parser.response else "respons tidak lengkap"
+            return False, 0, 0, timer.finish(False, error=error)
+        except Exception as err:
+            return False, 0, 0, timer.finish(False, error=err)
+        finally:
+            parser.abort()
+            sock.close()
+
+    def upload_file(self, filepath, remote_name=None):
+        """Hasil: (sukses, durasi, ukuran, record timing per request)
 
-    def upload_file(self, filepath):
+        remote_name: nama file di server (default: nama file tanpa direktori)
+        """
         start = time.time()
+        timer = RequestTimer("upload")
         if not os.path.isfile(filepath):
-            return False, 0, 0
+            return False, 0, 0, timer.finish(False, error="file tidak ditemukan")
 
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout_duration)
         try:
+            file_size = os.path.getsize(filepath)
+            sock.connect(self.target)
+            timer.mark_connected()
+            sock.sendall(f"UPLOAD {remote_name or os.path.basename(filepath)} ".encode())
             with open(filepath, "rb") as in_file:
-                file_size = os.path.getsize(filepath)
-                encoded_data = base64.b64encode(in_file.read()).decode()
+                for encoded_chunk in encode_file_chunks(in_file):
+                    sock.sendall(encoded_chunk)
+            sock.sendall(b"\r\n\r\n")
+            timer.mark_sent()
 
-            response = self.send_request(f"UPLOAD {filepath} {encoded_data}")
+            response = self._receive_response(sock, timer)
             duration = time.time() - start
 
             if response and response.get("status") == "OK":
-                return True, duration, file_size
+                return True, duration, file_size, timer.finish(True, file_size)
+            return False, 0, 0, timer.finish(False, error=response.get("data"))
+        except Exception as err:
+            return False, 0, 0, timer.finish(False, error=err)
+        finally:
+            sock.close()
+
+    def _read_header(self, reader):
+        # header JSON tidak mengandung newline, jadi cukup baca per baris
+        # sampai terminator \r\n\r\n
+        header = b""
+        while not header.endswith(b"\r\n\r\n"):
+            line = reader.readline()
+            if not line:
+                break
+            header += line
+        return json.loads(header.decode())
+
+    def download_many(self, names, destination="."):
+        """Ambil banyak file (nama atau pola glob) lewat satu request MGET.
+
+        Setiap file langsung ditulis ke disk begitu record-nya tiba.
+        """
+        start = time.time()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout_duration)
+        received = []
+        total_bytes = 0
+        try:
+            sock.connect(self.target)
+            sock.sendall(("MGET " + " ".join(names) + "\r\n\r\n").encode())
+            reader = sock.makefile("rb")
+            response = self._read_header(reader)
+            if response.get("status") != "OK":
+                return False, 0, 0
+
+            for _ in range(response["count"]):
+                size, fname = reader.readline().decode().rstrip("\n").split(" ", 1)
+                size = int(size)
+                if size < 0:
+                    continue
+                with open(os.path.join(destination, os.path.basename(fname)), "wb") as out_file:
+                    remaining = size
+                    while remaining > 0:
+                        chunk = reader.read(min(1024 * 1024, remaining))
+                        if not chunk:
+                            raise ConnectionError("koneksi terputus di tengah record")
+                        out_file.write(chunk)
+                        remaining -= len(chunk)
+                received.append(fname)
+                total_bytes += size
+
+            duration = time.time() - start
+            return len(received) == response["count"], duration, total_bytes
+        except Exception:
+            return False, 0, 0
+        finally:
+            sock.close()
+
+    def upload_many(self, filepaths):
+        start = time.time()
+        try:
+            parts = []
+            total_bytes = 0
+            for filepath in filepaths:
+                with open(filepath, "rb") as in_file:
+                    content = in_file.read()
+                parts.append(f"{os.path.basename(filepath)} {base64.b64encode(content).decode()}")
+                total_bytes += len(content)
+
+            response = self.send_request("MUPLOAD " + " ".join(parts))
+            if response.get("status") == "OK":
+                return True, time.time() - start, total_bytes
             return False, 0, 0
         except Exception:
             return False, 0, 0
 
+    def delete_many(self, names):
+        response = self.send_request("MDELETE " + " ".join(names))
+        if response.get("status") == "OK":
+            return True, response["data"]
+        return False, response.get("data", "Unknown failure")
+
 def execute_task(client, job):
     action, filename = job
     if action == "download":
@@ -83,12 +209,18 @@ def execute_task(client, job):
     elif action == "upload":
         return client.upload_file(filename)
     elif action == "list":
-        return client.fetch_file_list()[0], 0, 0
-    return False, 0, 0
+        timer = RequestTimer("list")
+        response = client.send_request("LIST", timer)
+        ok = response.get("status") == "OK"
+        return ok, 0, 0, timer.finish(ok, error=response.get("data"))
+    return False, 0, 0, None
 
-def run_stress_test(ip, port, action, file, worker_count):
-    client = FileTransferClient(ip, port)
-    job_list = [(action, file) for _ in range(worker_count)]
+def run_stress_test(ip, port, action, file, worker_count, client=None):
+    # client lain dengan antarmuka sama (mis. cluster.ClusterFileTransferClient) boleh diberikan
+    client = client or FileTransferClient(ip, port)
+    # file boleh berupa daftar (group dari manifest corpus); client ke-i memakai file ke-i
+    files = file if isinstance(file, list) else [file]
+    job_list = [(action, files[i % len(files)]) for i in range(worker_count)]
 
     start = time.time()
     outcome = []
@@ -110,12 +242,13 @@ def run_stress_test(ip, port, action, file, worker_count):
 
     return {
         "operation": action,
-        "file_size": os.path.getsize(file) if file and os.path.exists(file) else 0,
+        "file_size": os.path.getsize(files[0]) if files[0] and os.path.exists(files[0]) else 0,
         "num_workers": worker_count,
         "total_time": duration,
         "throughput": rate,
         "successes": successful,
-        "failures": failed
+        "failures": failed,
+        "requests": [r[3] for r in outcome]
     }
 
 if __name__ == "__main__":
@@ -125,6 +258,8 @@ if __name__ == "__main__":
     arg_parser.add_argument("--operation", choices=["download", "upload"], required=True)
     arg_parser.add_argument("--filename")
     arg_parser.add_argument("--workers", type=int, default=5)
+    arg_parser.add_argument("--cluster-nodes", help="host:port,... (mode cluster, menggantikan --server-ip/--server-port)")
+    arg_parser.add_argument("--replicas", type=int, help="Replication factor mode cluster")
     args = arg_parser.parse_args()
 
     if args.operation in ["download", "upload"] and not args.filename:
@@ -132,7 +267,11 @@ if __name__ == "__main__":
         exit(1)
 
     logging.basicConfig(level=logging.WARNING)
-    stats = run_stress_test(args.server_ip, args.server_port, args.operation, args.filename, args.workers)
+    client = None
+    if args.cluster_nodes:
+        from cluster import ClusterFileTransferClient, load_nodes
+        client = ClusterFileTransferClient(load_nodes(args.cluster_nodes), args.replicas)
+    stats = run_stress_test(args.server_ip, args.server_port, args.operation, args.filename, args.workers, client)
 
     print("\n--- Stress Test Report ---")
     print(f"Operation   : {stats['operation']}")
@@ -144,3 +283,6 @@ if __name__ == "__main__":
         print(f"Throughput  : {stats['throughput'] / 1024 / 1024:.2f} MB/s")
     print(f"Successes   : {stats['successes']}")
     print(f"Failures    : {stats['failures']}")
+    latency = summarize(stats['requests'])
+    if latency['max'] is not None:
+        print(f"Latency     : p50 {latency['p50']:.1f} / p90 {latency['p90']:.1f} / p99 {latency['p99']:.1f} / max {latency['max']:.1f} ms")
@@ -1,16 +1,130 @@
 import os
 import json
 import base64
+import queue
+import fnmatch
+import hashlib
+import tempfile
+import threading
+import time
 from glob import glob
 
+from profiling import phase
 
-class FileInterface:
+
+LAYOUTS = ('flat', 'sharded')
+DURABILITY = ('none', 'group', 'file')
+STREAM_CHUNK = 1024 * 1024
+STREAM_PREFETCH = 16
+
+
+def shard_path(filename, depth=2):
+    """Path relatif file pada layout sharded, mis. 'ab/cd/nama.dat' untuk depth 2"""
+    digest = hashlib.md5(filename.encode()).hexdigest()
+    parts = [digest[i * 2:(i + 1) * 2] for i in range(depth)]
+    return os.path.join(*parts, filename)
+
+
+def fsync_dir(directory):
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class GroupCommitter:
+    """Menggabungkan rename dari upload yang berjalan bersamaan ke satu batch.
+
+    Isi file sudah di-fsync oleh thread upload masing-masing (paralel); di sini
+    hanya os.replace dan fsync direktori, sekali per direktori per batch.
+    Upload menunggu sampai batch-nya selesai di-commit, sehingga tetap durable
+    per request. Upload yang datang selama satu batch berjalan otomatis
+    terkumpul untuk batch berikutnya, jadi tidak perlu jeda tunggu.
+    """
     def __init__(self):
-        os.chdir('files/')
+        self.cond = threading.Condition()
+        self.pending = []
+        self.worker = None
+        self.batches = 0
+
+    def commit(self, temp_path, target):
+        entry = dict(temp=temp_path, target=target, done=threading.Event(), error=None)
+        with self.cond:
+            # thread dibuat saat dipakai pertama kali agar aman untuk worker hasil fork
+            if self.worker is None or not self.worker.is_alive():
+                self.worker = threading.Thread(target=self._run, daemon=True)
+                self.worker.start()
+            self.pending.append(entry)
+            self.cond.notify()
+        entry['done'].wait()
+        if entry['error'] is not None:
+            raise entry['error']
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.pending:
+                    self.cond.wait()
+                batch, self.pending = self.pending, []
+
+            directories = set()
+            for entry in batch:
+                try:
+                    os.replace(entry['temp'], entry['target'])
+                    directories.add(os.path.dirname(entry['target']))
+                except Exception as e:
+                    entry['error'] = e
+            for directory in directories:
+                try:
+                    fsync_dir(directory)
+                except OSError:
+                    pass
+            self.batches += 1
+            for entry in batch:
+                entry['done'].set()
+
+
+class FileInterface:
+    def __init__(self, directory=None, layout=None, depth=None, durability=None):
+        # konfigurasi bisa lewat argumen atau environment variable, supaya
+        # semua varian server ikut tanpa perlu mengubah cara menjalankannya
+        directory = directory or os.environ.get('FILE_STORE_DIR', 'files/')
+        self.layout = layout or os.environ.get('FILE_STORE_LAYOUT', 'flat')
+        self.depth = int(depth or os.environ.get('FILE_STORE_DEPTH', 2))
+        self.durability = durability or os.environ.get('FILE_STORE_DURABILITY', 'none')
+        if self.layout not in LAYOUTS:
+            raise ValueError(f"layout tidak dikenal: {self.layout}")
+        if self.durability not in DURABILITY:
+            raise ValueError(f"mode durability tidak dikenal: {self.durability}")
+        self.root = os.path.abspath(directory)
+        self.committer = GroupCommitter() if self.durability == 'group' else None
+        # path -> (size, mtime_ns, sha256); dihitung ulang hanya bila file berubah
+        self.hash_cache = {}
+        self.hash_lock = threading.Lock()
+
+    def _path(self, filename):
+        if self.layout == 'sharded':
+            return os.path.join(self.root, shard_path(filename, self.depth))
+        return os.path.join(self.root, filename)
+
+    def _scan(self, directory, level):
+        # scandir jauh lebih murah daripada glob('??/??/*.*') pada ribuan subdirektori
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if level < self.depth:
+                    if entry.is_dir():
+                        yield from self._scan(entry.path, level + 1)
+                elif '.' in entry.name[1:] and not entry.name.startswith('.'):
+                    yield entry.name
 
     def list(self,params=[]):
         try:
-            filelist = glob('*.*')
+            with phase('disk'):
+                if self.layout == 'sharded':
+                    filelist = list(self._scan(self.root, 0))
+                else:
+                    filelist = [os.path.basename(x) for x in glob(os.path.join(self.root, '*.*'))]
             return dict(status='OK',data=filelist)
         except Exception as e:
             return dict(status='ERROR',data=str(e))
@@ -20,8 +134,10 @@ class FileInterface:
             filename = params[0]
             if (filename == ''):
                 return None
-            fp = open(f"{filename}",'rb')
-            isifile = base64.b64encode(fp.read()).decode()
+            with phase('disk'), open(self._path(filename),'rb') as fp:
+                isi = fp.read()
+            with phase('encode'):
+                isifile = base64.b64encode(isi).decode()
             return dict(status='OK',data_namafile=filename,data_file=isifile)
         except Exception as e:
             return dict(status='ERROR',data=str(e))
@@ -30,34 +146,223 @@ class FileInterface:
         try:
             if len(params) < 2:
                 return dict(status='ERROR', data='Parameter tidak lengkap')
-                
+
             filename = params[0]
             file_content = params[1]
-            
-            file_bytes = base64.b64decode(file_content)
-            
-            with open(filename, 'wb') as fp:
-                fp.write(file_bytes)
-                
+
+            with phase('encode'):
+                file_bytes = base64.b64decode(file_content)
+
+            target = self._path(filename)
+            with phase('disk'):
+                self._write_atomic(target, file_bytes)
+
             return dict(status='OK', data=f"File {filename} berhasil diupload")
         except Exception as e:
             return dict(status='ERROR', data=str(e))
 
+    def _write_atomic(self, target, file_bytes):
+        # tulis ke file sementara milik request ini lalu rename, sehingga upload
+        # bersamaan ke nama yang sama tidak saling menimpa dan pembaca tidak
+        # pernah melihat file yang setengah jadi
+        directory = os.path.dirname(target)
+        if self.layout == 'sharded':
+            os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(target)}.", suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                fp.write(file_bytes)
+                if self.durability != 'none':
+                    # fsync isi file di thread upload sendiri, juga untuk mode group
+                    fp.flush()
+                    os.fsync(fp.fileno())
+            os.chmod(temp_path, 0o644)
+            if self.durability == 'group':
+                self.committer.commit(temp_path, target)
+            else:
+                os.replace(temp_path, target)
+                if self.durability == 'file':
+                    fsync_dir(directory)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
     def delete(self, params=[]):
         try:
             if len(params) < 1:
                 return dict(status='ERROR', data='Parameter tidak lengkap')
-                
+
             filename = params[0]
-            
-            if not os.path.exists(filename):
+            target = self._path(filename)
+
+            if not os.path.exists(target):
                 return dict(status='ERROR', data=f"File {filename} tidak ditemukan")
-                
-            os.remove(filename)
+
+            with phase('disk'):
+                os.remove(target)
+            with self.hash_lock:
+                self.hash_cache.pop(target, None)
             return dict(status='OK', data=f"File {filename} berhasil dihapus")
         except Exception as e:
             return dict(status='ERROR', data=str(e))
 
+    def _expand(self, params):
+        # parameter batch boleh berupa nama file maupun pola glob (mis. *.jpg)
+        names = []
+        available = None
+        for param in params:
+            if any(ch in param for ch in '*?['):
+                if available is None:
+                    available = self.list()['data']
+                names.extend(fnmatch.filter(available, param))
+            elif param:
+                names.append(param)
+        return list(dict.fromkeys(names))
+
+    def mget(self, params=[]):
+        """Generator bytes untuk respons MGET: header JSON lalu record per file.
+
+        Setiap record berbentuk "<ukuran> <nama>\\n" diikuti isi file mentah
+        sebanyak <ukuran> bytes; ukuran -1 berarti file tidak bisa dibaca.
+        Pembacaan disk dilakukan thread terpisah yang mengisi antrian terbatas,
+        sehingga disk dan socket bekerja bersamaan tanpa memori berlebih.
+        Bila file gagal dibaca setelah header ukurannya terkirim, generator
+        melempar OSError sehingga server menutup koneksi (client melihat
+        record terpotong, bukan isi palsu).
+        Nilai return generator: dict(count, missing) untuk statistik server.
+        """
+        names = self._expand(params)
+        buffer = queue.Queue(maxsize=STREAM_PREFETCH)
+        stop = threading.Event()
+        missing = []
+
+        def put(item):
+            while not stop.is_set():
+                try:
+                    buffer.put(item, timeout=1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def reader():
+            for name in names:
+                try:
+                    fp = open(self._path(name), 'rb')
+                    size = os.fstat(fp.fileno()).st_size
+                except OSError:
+                    # -1 hanya boleh dikirim sebelum header ukuran record
+                    missing.append(name)
+                    if not put(f"-1 {name}\n".encode()):
+                        return
+                    continue
+                with fp:
+                    if not put(f"{size} {name}\n".encode()):
+                        return
+                    remaining = size
+                    while remaining > 0:
+                        try:
+                            with phase('disk'):
+                                chunk = fp.read(min(STREAM_CHUNK, remaining))
+                            if not chunk:
+                                raise OSError(f"{name} memendek saat dibaca")
+                        except OSError as e:
+                            # ukuran sudah diumumkan: stream dihentikan, bukan diisi nol
+                            put(e)
+                            return
+                        remaining -= len(chunk)
+                        if not put(chunk):
+                            return
+            put(None)
+
+        prefetcher = threading.Thread(target=reader, daemon=True)
+        prefetcher.start()
+        try:
+            yield (json.dumps(dict(status='OK', count=len(names))) + "\r\n\r\n").encode()
+            pending = bytearray()
+            while True:
+                try:
+                    item = buffer.get_nowait() if pending else buffer.get()
+                except queue.Empty:
+                    yield bytes(pending)
+                    pending.clear()
+                    continue
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    # koneksi ditutup server tanpa mengirim sisa record
+                    raise item
+                pending += item
+                if len(pending) >= STREAM_CHUNK:
+                    yield bytes(pending)
+                    pending.clear()
+            if pending:
+                yield bytes(pending)
+            return dict(count=len(names), missing=len(missing))
+        finally:
+            stop.set()
+
+    def _sha256(self, path, stat):
+        key = (stat.st_size, stat.st_mtime_ns)
+        with self.hash_lock:
+            cached = self.hash_cache.get(path)
+        if cached and cached[0] == key:
+            return cached[1]
+        digest = hashlib.sha256()
+        with open(path, 'rb') as fp:
+            while True:
+                with phase('disk'):
+                    chunk = fp.read(STREAM_CHUNK)
+                if not chunk:
+                    break
+                digest.update(chunk)
+        with self.hash_lock:
+            self.hash_cache[path] = (key, digest.hexdigest())
+        return digest.hexdigest()
+
+    def info(self, params=[]):
+        """Ukuran dan mtime file (INFO [HASH] [nama/pola ...]); tanpa nama berarti semua file.
+
+        Dengan HASH setiap entry juga berisi sha256 isi file. File yang tidak
+        ada tidak ikut dalam hasil.
+        """
+        try:
+            with_hash = bool(params) and params[0].upper() == 'HASH'
+            if with_hash:
+                params = params[1:]
+            names = self._expand(params) if params else self.list()['data']
+            result = []
+            for name in names:
+                path = self._path(name)
+                try:
+                    with phase('disk'):
+                        stat = os.stat(path)
+                except OSError:
+                    continue
+                entry = dict(namafile=name, size=stat.st_size, mtime=stat.st_mtime)
+                if with_hash:
+                    entry['sha256'] = self._sha256(path, stat)
+                result.append(entry)
+            return dict(status='OK', data=result)
+        except Exception as e:
+            return dict(status='ERROR', data=str(e))
+
+    def mupload(self, params=[]):
+        if len(params) < 2 or len(params) % 2:
+            return dict(status='ERROR', data='Parameter tidak lengkap')
+        results = [dict(namafile=params[i], **self.upload(params[i:i + 2])) for i in range(0, len(params), 2)]
+        status = 'OK' if all(r['status'] == 'OK' for r in results) else 'ERROR'
+        return dict(status=status, data=results)
+
+    def mdelete(self, params=[]):
+        names = self._expand(params)
+        if not names:
+            return dict(status='ERROR', data='Parameter tidak lengkap')
+        results = [dict(namafile=name, **self.delete([name])) for name in names]
+        status = 'OK' if all(r['status'] == 'OK' for r in results) else 'ERROR'
+        return dict(status=status, data=results)
+
 if __name__=='__main__':
     f = FileInterface()
     print(f.list())
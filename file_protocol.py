@@ -1,8 +1,14 @@
 import json
 import logging
+import os
+import time
 import shlex
+import multiprocessing
 
+import profiling
 from file_interface import FileInterface
+from profiling import phase
+from traffic_trace import TraceWriter, b64_size
 
 """
 * class FileProtocol bertugas untuk memproses 
@@ -18,21 +24,155 @@ string
 
 
 
+class ServerStats:
+    """Penghitung request sukses/gagal di sisi server.
+
+    Memakai multiprocessing.Value sehingga satu objek bisa dibagi ke semua
+    thread maupun proses worker (diteruskan lewat initializer pool).
+    """
+    def __init__(self, context=None):
+        context = context or multiprocessing
+        self.success = context.Value('q', 0)
+        self.fail = context.Value('q', 0)
+
+    def record(self, ok):
+        counter = self.success if ok else self.fail
+        with counter.get_lock():
+            counter.value += 1
+
+    def snapshot(self):
+        return dict(success=self.success.value, fail=self.fail.value)
+
+
 class FileProtocol:
-    def __init__(self):
-        self.file = FileInterface()
+    # perintah yang responsnya dikirim bertahap, bukan satu JSON utuh
+    stream_commands = ('mget',)
+    # hanya method ini yang boleh dipanggil dari jaringan; helper FileInterface lain tidak
+    file_commands = ('list', 'get', 'upload', 'delete', 'info', 'mget', 'mupload', 'mdelete')
+
+    def __init__(self, stats=None, trace_path=None, profile_control=None, pool_control=None, **store_options):
+        self.file = FileInterface(**store_options)
+        self.stats = stats or ServerStats()
+        trace_path = trace_path or os.environ.get('FILE_SERVER_TRACE')
+        self.trace = TraceWriter(trace_path) if trace_path else None
+        self.profile_control = profile_control or profiling.ProfileControl()
+        profiling.setup(self.profile_control)
+        # diisi server pool (autoscale.PoolControl); server tanpa pool tidak mendukung POOLSIZE
+        self.pool_control = pool_control
+        # perintah administrasi ditangani protokol sendiri dan tidak ikut dihitung
+        self.admin_commands = dict(stats=self.stats_command, profile=self.profile_command,
+                                   poolsize=self.poolsize_command)
+
+    def stats_command(self, params=[]):
+        return dict(status='OK', data=self.stats.snapshot())
+
+    def profile_command(self, params=[]):
+        action = params[0].lower() if params else 'status'
+        if action == 'on':
+            self.profile_control.set(True)
+        elif action == 'off':
+            self.profile_control.set(False)
+        elif action == 'dump':
+            self.profile_control.request_dump()
+        elif action != 'status':
+            return dict(status='ERROR', data='gunakan PROFILE ON|OFF|DUMP|STATUS')
+        # worker yang menerima perintah langsung menyesuaikan diri, worker lain saat koneksi berikutnya
+        profiling.current().sync()
+        return dict(status='OK', data=dict(enabled=bool(self.profile_control.enabled.value),
+                                           directory=self.profile_control.directory))
+
+    def poolsize_command(self, params=[]):
+        if self.pool_control is None:
+            return dict(status='ERROR', data='server ini tidak memakai pool worker')
+        action = params[0].lower() if params else 'status'
+        if action == 'auto':
+            self.pool_control.resume_auto()
+        elif action.isdigit():
+            limits = self.pool_control.snapshot()
+            if not limits['min'] <= int(action) <= limits['max']:
+                return dict(status='ERROR', data=f"ukuran pool harus di antara {limits['min']} dan {limits['max']}")
+            # diterapkan oleh autoscaler di proses utama dalam waktu kurang dari satu detik
+            self.pool_control.request(int(action))
+        elif action != 'status':
+            return dict(status='ERROR', data='gunakan POOLSIZE <jumlah worker>|AUTO|STATUS')
+        return dict(status='OK', data=self.pool_control.snapshot())
+
+    def trace_request(self, command, params, response, ok, ts, start, size=0):
+        if self.trace is None:
+            return
+        if command in ('upload', 'mupload'):
+            files, size = params[0::2], sum(b64_size(x) for x in params[1::2])
+        elif command == 'get' and ok:
+            files, size = params[:1], b64_size(response.get('data_file', ''))
+        else:
+            files = params
+        self.trace.record(ts, command, files, size, (time.perf_counter() - start) * 1000, 'OK' if ok else 'ERROR')
+
     def proses_string(self,string_datamasuk=''):
         # logging.warning(f"string diproses: {string_datamasuk}")
-        c = string_datamasuk.split(' ')
-        try:
+        ts, start = time.time(), time.perf_counter()
+        with phase('parse'):
+            c = string_datamasuk.split(' ')
             c_request = c[0].strip().lower()
-            # logging.warning(f"memproses request: {c_request}")
             params = [x for x in c[1:]]
+        try:
+            # logging.warning(f"memproses request: {c_request}")
+            if c_request in self.admin_commands:
+                return json.dumps(self.admin_commands[c_request](params))
+            if c_request not in self.file_commands:
+                raise ValueError(c_request)
             cl = getattr(self.file,c_request)(params)
-            return json.dumps(cl)
+            ok = isinstance(cl, dict) and cl.get('status') == 'OK'
+            self.stats.record(ok)
+            self.trace_request(c_request, params, cl, ok, ts, start)
+            with phase('encode'):
+                return json.dumps(cl)
         except Exception:
+            self.stats.record(False)
+            self.trace_request(c_request, params, None, False, ts, start)
             return json.dumps(dict(status='ERROR',data='request tidak dikenali'))
 
+    def proses_request(self,string_datamasuk=''):
+        """Hasilkan respons sebagai potongan bytes yang siap dikirim ke socket"""
+        c = string_datamasuk.split(' ')
+        c_request = c[0].strip().lower()
+        if c_request in self.stream_commands:
+            ts, start, sent = time.time(), time.perf_counter(), 0
+            stream = getattr(self.file,c_request)(c[1:])
+            recorded = False
+
+            def record(ok):
+                nonlocal recorded
+                recorded = True
+                self.stats.record(ok)
+                self.trace_request(c_request, c[1:], None, ok, ts, start, size=sent)
+
+            def next_block():
+                try:
+                    return next(stream), None
+                except StopIteration as done:
+                    # nilai return generator menyebut berapa file yang tidak terbaca
+                    return None, done.value or {}
+
+            try:
+                block, result = next_block()
+                while block is not None:
+                    following, result = next_block()
+                    sent += len(block)
+                    if following is None:
+                        # dicatat sebelum blok terakhir dikirim, supaya STATS tepat
+                        # setelah client menerima seluruh respons sudah mutakhir
+                        record(not result.get('missing'))
+                    yield block
+                    block = following
+            finally:
+                stream.close()
+                # stream gagal di tengah atau client memutus koneksi
+                if not recorded:
+                    record(False)
+        else:
+            yield (self.proses_string(string_datamasuk)+"\r\n\r\n").encode()
+
 
 if __name__=='__main__':
     #contoh pemakaian
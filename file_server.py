@@ -4,68 +4,171 @@ import threading
 import logging
 import time
 import sys
+import os
 
 
+import access_log
+import profiling
 from file_protocol import  FileProtocol
+from profiling import phase
 fp = FileProtocol()
 
+"""
+* satu thread per koneksi, dengan batas supaya aman dipakai terus-menerus
+
+* konfigurasi lewat argumen Server atau environment variable:
+  FILE_SERVER_BACKLOG          antrian koneksi di kernel (default 128)
+  FILE_SERVER_MAX_CONNECTIONS  koneksi aktif maksimum (default 256); koneksi
+                               berikutnya menunggu di backlog, bukan ditolak
+  FILE_SERVER_IDLE_TIMEOUT     detik menunggu request berikutnya sebelum
+                               koneksi ditutup (default 60, 0 = tanpa batas)
+* request dipisah dengan "\r\n\r\n" dan satu koneksi boleh mengirim banyak
+  request (keep-alive); thread yang selesai langsung dilepas dari the_clients
+"""
+
+RECV_CHUNK = 1024 * 1024
+DELIMITER = b"\r\n\r\n"
+
 
 class ProcessTheClient(threading.Thread):
-    def __init__(self, connection, address):
+    def __init__(self, connection, address, protocol=None, idle_timeout=None, on_finish=None):
         self.connection = connection
         self.address = address
-        threading.Thread.__init__(self)
+        self.protocol = protocol or fp
+        self.idle_timeout = idle_timeout
+        self.on_finish = on_finish
+        threading.Thread.__init__(self, daemon=True)
 
     def run(self):
-        rcv = ""
-        while True:
-            try:
-                data = self.connection.recv(32768)
-                if data:
-                    d = data.decode()
-                    rcv = rcv + d
-                    
-                    if len(data) < 32768:
-                        hasil = fp.proses_string(rcv)
-                        hasil = hasil+"\r\n\r\n"
-                        self.connection.sendall(hasil.encode())
-                        rcv = ""
-                        break
-                else:
-                    if rcv:
-                        hasil = fp.proses_string(rcv)
-                        hasil = hasil+"\r\n\r\n"
-                        self.connection.sendall(hasil.encode())
+        try:
+            with profiling.session():
+                self.handle()
+        finally:
+            if self.on_finish:
+                self.on_finish(self)
+
+    def handle(self):
+        buffer = bytearray()
+        scanned = 0
+        try:
+            while True:
+                # timeout hanya berlaku saat menunggu data, bukan saat mengirim respons besar
+                self.connection.settimeout(self.idle_timeout)
+                try:
+                    with phase('recv'):
+                        data = self.connection.recv(RECV_CHUNK)
+                except socket.timeout:
+                    logging.debug("koneksi %s idle, ditutup", self.address)
                     break
-            except Exception as e:
-                logging.warning(f"Error processing client request: {str(e)}")
-                break
-        self.connection.close()
+                if not data:
+                    # client yang menutup sisi kirim tanpa delimiter tetap dilayani
+                    if buffer.strip():
+                        self.respond(buffer.decode())
+                    break
+                buffer += data
+                # upload besar datang bertahap; cari delimiter hanya di bagian yang baru
+                while True:
+                    index = buffer.find(DELIMITER, max(0, scanned - len(DELIMITER) + 1))
+                    if index < 0:
+                        scanned = len(buffer)
+                        break
+                    with phase('parse'):
+                        request = buffer[:index].decode()
+                        del buffer[:index + len(DELIMITER)]
+                    scanned = 0
+                    self.connection.settimeout(None)
+                    self.respond(request)
+        except Exception as e:
+            logging.warning(f"Error processing client request: {str(e)}")
+        finally:
+            self.connection.close()
+
+    def respond(self, request):
+        started, bytes_out, ok = time.perf_counter(), 0, None
+        for hasil in self.protocol.proses_request(request):
+            if ok is None:
+                ok = access_log.response_ok(hasil)
+            with phase('send'):
+                self.connection.sendall(hasil)
+            bytes_out += len(hasil)
+        access_log.log_request(self.address, request, started, bytes_out, ok)
 
 
 class Server(threading.Thread):
-    def __init__(self,ipaddress='0.0.0.0',port=8889):
+    def __init__(self,ipaddress='0.0.0.0',port=8889,protocol=None,backlog=None,max_connections=None,
+                 idle_timeout=None):
         self.ipinfo=(ipaddress,port)
-        self.the_clients = []
+        self.the_clients = set()
+        self.clients_lock = threading.Lock()
+        self.protocol = protocol or fp
+        self.backlog = backlog or int(os.environ.get('FILE_SERVER_BACKLOG', 128))
+        self.max_connections = max_connections or int(os.environ.get('FILE_SERVER_MAX_CONNECTIONS', 256))
+        if idle_timeout is None:
+            idle_timeout = float(os.environ.get('FILE_SERVER_IDLE_TIMEOUT', 60))
+        self.idle_timeout = idle_timeout or None
+        self.slots = threading.BoundedSemaphore(self.max_connections)
+        self.running = True
         self.my_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.access_log = access_log.start()
         threading.Thread.__init__(self)
 
     def run(self):
-        logging.warning(f"server berjalan di ip address {self.ipinfo}")
+        logging.warning(f"server berjalan di ip address {self.ipinfo} "
+                        f"(backlog {self.backlog}, maks {self.max_connections} koneksi)")
         self.my_socket.bind(self.ipinfo)
-        self.my_socket.listen(1)
-        while True:
-            self.connection, self.client_address = self.my_socket.accept()
-            logging.warning(f"connection from {self.client_address}")
+        self.my_socket.listen(self.backlog)
+        while self.running:
+            # saat koneksi penuh, accept ditunda sehingga klien baru menunggu di backlog
+            if not self.slots.acquire(timeout=1):
+                continue
+            try:
+                self.connection, self.client_address = self.my_socket.accept()
+            except OSError:
+                self.slots.release()
+                if not self.running:
+                    break
+                raise
+            logging.debug("connection from %s", self.client_address)
+
+            clt = None
+            try:
+                clt = ProcessTheClient(self.connection, self.client_address, self.protocol, self.idle_timeout,
+                                       self.client_finished)
+                with self.clients_lock:
+                    self.the_clients.add(clt)
+                clt.start()
+            except Exception as e:
+                # mis. "can't start new thread": slot harus kembali agar kapasitas tidak menyusut
+                logging.warning(f"gagal melayani {self.client_address}: {str(e)}")
+                self.connection.close()
+                with self.clients_lock:
+                    self.the_clients.discard(clt)
+                self.slots.release()
+
+    def client_finished(self, client):
+        with self.clients_lock:
+            self.the_clients.discard(client)
+        self.slots.release()
+
+    def active_connections(self):
+        with self.clients_lock:
+            return len(self.the_clients)
 
-            clt = ProcessTheClient(self.connection, self.client_address)
-            clt.start()
-            self.the_clients.append(clt)
+    def stop(self):
+        self.running = False
+        try:
+            self.my_socket.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.my_socket.close()
+        if self.access_log:
+            self.access_log.stop()
 
 
 def main():
     svr = Server(ipaddress='0.0.0.0',port=7777)
+    profiling.install_signal_handler(svr.protocol.profile_control)
     svr.start()
 
 
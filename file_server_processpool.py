@@ -1,63 +1,117 @@
 import socket
 import logging
+import multiprocessing
+import time
 import sys
 from concurrent.futures import ProcessPoolExecutor
-from file_protocol import FileProtocol
+import access_log
+import autoscale
+import profiling
+from file_protocol import FileProtocol, ServerStats
+from profiling import ProfileControl, phase
 
-def setup_worker():
+def setup_worker(stats=None, store_options={}, profile_control=None, log_queue=None, sample_rate=None,
+                 log_level=None, pool_control=None):
     global protocol_handler
-    protocol_handler = FileProtocol()
+    if log_queue is not None:
+        # log worker dikirim ke proses utama, bukan langsung ke stderr
+        access_log.attach(log_queue, sample_rate, forward_logs=True, level=log_level)
+    protocol_handler = FileProtocol(stats=stats, profile_control=profile_control, pool_control=pool_control,
+                                    **store_options)
 
 def process_client(conn, addr):
+    with profiling.session():
+        handle_client(conn, addr)
+
+def handle_client(conn, addr):
     data_buffer = ""
     try:
         while True:
-            chunk = conn.recv(1024 * 1024)
+            with phase('recv'):
+                chunk = conn.recv(1024 * 1024)
             if not chunk:
                 break
-            data_buffer += chunk.decode()
+            with phase('parse'):
+                data_buffer += chunk.decode()
 
             while "\r\n\r\n" in data_buffer:
-                raw_command, data_buffer = data_buffer.split("\r\n\r\n", 1)
-                logging.warning(f"Command diterima: {raw_command[:50]}...")  
-                response_data = protocol_handler.proses_string(raw_command)
-                complete_response = response_data + "\r\n\r\n"
-                conn.sendall(complete_response.encode())
+                with phase('parse'):
+                    raw_command, data_buffer = data_buffer.split("\r\n\r\n", 1)
+                started, bytes_out, ok = time.perf_counter(), 0, None
+                for response_data in protocol_handler.proses_request(raw_command):
+                    if ok is None:
+                        ok = access_log.response_ok(response_data)
+                    with phase('send'):
+                        conn.sendall(response_data)
+                    bytes_out += len(response_data)
+                access_log.log_request(addr, raw_command, started, bytes_out, ok)
     except Exception as err:
         logging.error(f"Gagal menangani klien {addr}: {str(err)}")
     finally:
         conn.close()
-        logging.warning(f"Koneksi dari {addr} ditutup")
+        logging.debug("Koneksi dari %s ditutup", addr)
 
 class FileServer:
-    def __init__(self, host="0.0.0.0", port=7779, max_workers=5):
+    def __init__(self, host="0.0.0.0", port=7779, max_workers=5, store_options={}, mp_context=None):
         self.server_address = (host, port)
         self.worker_limit = max_workers
-        self.pool = ProcessPoolExecutor(
-            max_workers=max_workers,
-            initializer=setup_worker
-        )
+        # counter dibuat di proses utama lalu dibagi ke semua worker
+        self.stats = ServerStats(mp_context)
+        self.profile_control = ProfileControl(mp_context)
+        self.log_writer = access_log.AccessLogWriter(context=mp_context or multiprocessing.get_context(),
+                                                     forward_logs=True)
+        self.pool_control = autoscale.PoolControl(max_workers, context=mp_context)
+        self.running = True
+        initargs = (self.stats, store_options, self.profile_control, self.log_writer.queue,
+                    self.log_writer.sample_rate if self.log_writer.enabled else None,
+                    logging.getLogger().getEffectiveLevel(), self.pool_control)
+        # saat ukuran berubah dibuat pool baru; proses pool lama selesai menangani koneksinya lalu keluar
+        self.pool = autoscale.ResizableExecutor(
+            lambda n: ProcessPoolExecutor(max_workers=n, mp_context=mp_context,
+                                          initializer=setup_worker, initargs=initargs),
+            max_workers)
+        self.autoscaler = autoscale.Autoscaler(self.pool, self.pool_control, name="processpool")
         self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
 
+    def stop(self):
+        self.running = False
+        # shutdown membangunkan accept() yang sedang menunggu di thread lain
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
     def run(self):
-        logging.warning(f"Server aktif di {self.server_address} dengan {self.worker_limit} proses")
+        limits = self.pool_control.snapshot()
+        logging.warning(f"Server aktif di {self.server_address} dengan {self.worker_limit} proses "
+                        f"(min {limits['min']}, max {limits['max']}, autoscale {'aktif' if limits['auto'] else 'mati'})")
         self.sock.bind(self.server_address)
         self.sock.listen(100)
+        self.autoscaler.start()
 
         try:
-            while True:
-                client_conn, client_addr = self.sock.accept()
-                logging.warning(f"Klien baru: {client_addr}")
+            while self.running:
+                try:
+                    client_conn, client_addr = self.sock.accept()
+                except OSError:
+                    if not self.running:
+                        break
+                    raise
+                logging.debug("Klien baru: %s", client_addr)
                 self.pool.submit(process_client, client_conn, client_addr)
         except KeyboardInterrupt:
             logging.warning("Server dihentikan...")
         finally:
+            self.autoscaler.stop()
             self.pool.shutdown()
             self.sock.close()
+            self.log_writer.stop()
 
 if __name__ == "__main__":
     worker_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5
     logging.basicConfig(level=logging.WARNING)
     server = FileServer(host="0.0.0.0", port=7779, max_workers=worker_count)
+    profiling.install_signal_handler(server.profile_control)
     server.run()
@@ -2,57 +2,102 @@ from socket import *
 import socket
 import threading
 import logging
+import time
 import sys
 from concurrent.futures import ThreadPoolExecutor
+import access_log
+import autoscale
+import profiling
 from file_protocol import FileProtocol
+from profiling import phase
 
 file_handler = FileProtocol()
 
 class FileTransferThreadServer:
-    def __init__(self, host="0.0.0.0", port=7778, thread_limit=5):
+    def __init__(self, host="0.0.0.0", port=7778, thread_limit=5, protocol=None):
         self.server_address = (host, port)
         self.thread_limit = thread_limit
-        self.executor = ThreadPoolExecutor(max_workers=thread_limit)
+        self.protocol = protocol or file_handler
+        self.running = True
+        # ukuran pool bisa berubah saat berjalan (autoscaler / perintah POOLSIZE)
+        self.pool_control = autoscale.PoolControl(thread_limit)
+        self.protocol.pool_control = self.pool_control
+        self.executor = autoscale.ResizableExecutor(lambda n: ThreadPoolExecutor(max_workers=n), thread_limit)
+        self.autoscaler = autoscale.Autoscaler(self.executor, self.pool_control, name="threadpool")
         self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.access_log = access_log.start()
 
     def run(self):
-        logging.warning(f"[ACTIVE] Server listening on {self.server_address} with {self.thread_limit} threads")
+        limits = self.pool_control.snapshot()
+        logging.warning(f"[ACTIVE] Server listening on {self.server_address} with {self.thread_limit} threads "
+                        f"(min {limits['min']}, max {limits['max']}, autoscale {'on' if limits['auto'] else 'off'})")
         self.listener.bind(self.server_address)
         self.listener.listen(100)
+        self.autoscaler.start()
         
         try:
-            while True:
-                client_sock, client_info = self.listener.accept()
-                logging.warning(f"[NEW CLIENT] {client_info} connected")
+            while self.running:
+                try:
+                    client_sock, client_info = self.listener.accept()
+                except OSError:
+                    if not self.running:
+                        break
+                    raise
+                logging.debug("[NEW CLIENT] %s connected", client_info)
                 self.executor.submit(self.process_client, client_sock, client_info)
         except KeyboardInterrupt:
             logging.warning("[SHUTDOWN] Server manually stopped.")
         finally:
+            self.autoscaler.stop()
             self.executor.shutdown()
             self.listener.close()
+            if self.access_log:
+                self.access_log.stop()
+
+    def stop(self):
+        self.running = False
+        # shutdown membangunkan accept() yang sedang menunggu di thread lain
+        try:
+            self.listener.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.listener.close()
 
     def process_client(self, sock, client_info):
+        with profiling.session():
+            self.handle_client(sock, client_info)
+
+    def handle_client(self, sock, client_info):
         input_buffer = ""
         try:
             while True:
-                packet = sock.recv(1024 * 1024)  
+                with phase('recv'):
+                    packet = sock.recv(1024 * 1024)  
                 if not packet:
                     break
-                input_buffer += packet.decode()
+                with phase('parse'):
+                    input_buffer += packet.decode()
                 while "\r\n\r\n" in input_buffer:
-                    command_block, input_buffer = input_buffer.split("\r\n\r\n", 1)
-                    logging.warning(f"[COMMAND] From {client_info}: {command_block[:50]}...")
-                    response_block = file_handler.proses_string(command_block)
-                    sock.sendall((response_block + "\r\n\r\n").encode())
+                    with phase('parse'):
+                        command_block, input_buffer = input_buffer.split("\r\n\r\n", 1)
+                    started, bytes_out, ok = time.perf_counter(), 0, None
+                    for response_block in self.protocol.proses_request(command_block):
+                        if ok is None:
+                            ok = access_log.response_ok(response_block)
+                        with phase('send'):
+                            sock.sendall(response_block)
+                        bytes_out += len(response_block)
+                    access_log.log_request(client_info, command_block, started, bytes_out, ok)
         except Exception as err:
             logging.error(f"[ERROR] While handling {client_info}: {str(err)}")
         finally:
             sock.close()
-            logging.warning(f"[DISCONNECT] {client_info} connection closed.")
+            logging.debug("[DISCONNECT] %s connection closed.", client_info)
 
 if __name__ == "__main__":
     threads = int(sys.argv[1]) if len(sys.argv) > 1 else 5
     logging.basicConfig(level=logging.WARNING)
     server_instance = FileTransferThreadServer(host="0.0.0.0", port=7778, thread_limit=threads)
+    profiling.install_signal_handler(server_instance.protocol.profile_control)
     server_instance.run()
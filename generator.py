@@ -1,27 +1,161 @@
 # file_generator.py
 import os
+import re
+import csv
+import math
 import random
 import logging
 from glob import glob
+from concurrent.futures import ProcessPoolExecutor
+
+"""
+* pembuat corpus file uji
+
+* isi file ditentukan oleh (seed, nama file, indeks blok 1 MB), sehingga
+  hasilnya sama persis di setiap run dan tidak bergantung pada berapa
+  proses yang ikut menulis
+* profil isi: random (tidak bisa dikompres), text (mirip teks), zeros
+* corpus dicatat dalam manifest CSV (name,size,group,profile,seed) yang bisa
+  dipakai stress test lewat --manifest; default ditulis di samping direktori
+  corpus (files/ -> files_manifest.csv), bukan di dalamnya, supaya tidak ikut
+  terlihat di LIST ketika corpus adalah storage server. Kolom name relatif
+  terhadap direktori manifest
+"""
+
+BLOCK_SIZE = 1024 * 1024
+SEGMENT_SIZE = 64 * BLOCK_SIZE
+PROFILES = ('random', 'text', 'zeros')
+MANIFEST_COLUMNS = ['name', 'size', 'group', 'profile', 'seed']
+UNITS = {'': 1, 'B': 1, 'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+
+_text_pools = {}
+
+
+def parse_size(text):
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMG]?B?)\s*', text.upper())
+    if not match:
+        raise ValueError(f"ukuran tidak valid: {text}")
+    return int(float(match.group(1)) * UNITS[match.group(2)])
+
+
+def parse_groups(spec):
+    """'small=1000x4KB-64KB,huge=2x1GB' -> [(group, count, min_size, max_size)]"""
+    groups = []
+    for part in spec.split(','):
+        if not part.strip():
+            continue
+        label, _, body = part.rpartition('=')
+        count, _, sizes = body.partition('x')
+        low, _, high = sizes.partition('-')
+        low = parse_size(low)
+        high = parse_size(high) if high else low
+        groups.append((label.strip() or body.strip(), int(count), min(low, high), max(low, high)))
+    return groups
+
+
+def plan_corpus(groups, seed=0):
+    """Daftar (nama, ukuran, group); ukuran dalam rentang dipilih log-uniform"""
+    entries = []
+    for label, count, low, high in groups:
+        rng = random.Random(f"{seed}:sizes:{label}")
+        width = len(str(count - 1))
+        for i in range(count):
+            if low == high:
+                size = low
+            else:
+                size = int(math.exp(rng.uniform(math.log(max(low, 1)), math.log(high))))
+            name = f"{label}.dat" if count == 1 else f"{label}_{i:0{width}d}.dat"
+            entries.append((name, size, label))
+    return entries
+
+
+def _text_pool(seed):
+    """Potongan teks 256 KB dari kosakata acak berdistribusi Zipf, dibuat sekali per proses"""
+    if seed not in _text_pools:
+        rng = random.Random(f"{seed}:text")
+        letters = 'etaoinshrdlcumwfgypbvkjxqz'
+        words = [''.join(rng.choices(letters, weights=range(26, 0, -1), k=rng.randint(2, 10)))
+                 for _ in range(2000)]
+        weights = [1 / (rank + 1) for rank in range(len(words))]
+        pool = []
+        size = 0
+        while size < 256 * 1024:
+            line = ' '.join(rng.choices(words, weights=weights, k=rng.randint(5, 15))) + '.\n'
+            pool.append(line)
+            size += len(line)
+        _text_pools[seed] = ''.join(pool).encode()
+    return _text_pools[seed]
+
+
+def make_block(profile, seed, name, index, length):
+    if profile == 'zeros':
+        return bytes(length)
+    rng = random.Random(f"{seed}:{name}:{index}")
+    if profile == 'random':
+        return rng.randbytes(length)
+    pool = _text_pool(seed)
+    parts = []
+    size = 0
+    while size < length:
+        start = rng.randrange(len(pool) - 4096)
+        piece = pool[start:start + rng.randint(64, 4096)]
+        parts.append(piece)
+        size += len(piece)
+    return b''.join(parts)[:length]
+
+
+def write_ranges(jobs):
+    """Isi potongan file [(path, nama, offset, panjang, profil, seed), ...]; dijalankan di worker"""
+    written = 0
+    for path, name, offset, length, profile, seed in jobs:
+        fd = os.open(path, os.O_WRONLY)
+        try:
+            end = offset + length
+            while offset < end:
+                n = min(BLOCK_SIZE, end - offset)
+                os.pwrite(fd, make_block(profile, seed, name, offset // BLOCK_SIZE, n), offset)
+                offset += n
+        finally:
+            os.close(fd)
+        written += length
+    return written
+
+
+def read_manifest_rows(path):
+    """{nama: baris manifest}; kosong bila manifest belum ada"""
+    if not os.path.exists(path):
+        return {}
+    with open(path, newline='') as f:
+        return {row['name']: row for row in csv.DictReader(f)}
+
+
+def default_manifest_path(directory):
+    directory = os.path.abspath(directory)
+    return os.path.join(os.path.dirname(directory), f"{os.path.basename(directory)}_manifest.csv")
+
+
+def load_manifest(path):
+    """Kelompokkan file di manifest per group: {group: [path, ...]}.
+
+    Path lokal diawali direktori manifest; client hanya mengirim nama file
+    (basename) ke server, jadi stress test bisa dijalankan dari mana saja.
+    """
+    base = os.path.dirname(path)
+    groups = {}
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            groups.setdefault(row['group'], []).append(os.path.join(base, row['name']))
+    return groups
+
 
 class FileGenerator:
     @staticmethod
-    def generate_file(filename, size_mb):
-        """Generate a random file of specified size in MB"""
-        size = size_mb * 1024 * 1024  
-        chunk_size = 1024 * 1024  
-        chunks = size // chunk_size
-        remainder = size % chunk_size
-        
+    def generate_file(filename, size_mb, seed=0, profile='random'):
+        """Generate a file of specified size in MB"""
         try:
-            with open(filename, 'wb') as f:
-                for _ in range(chunks):
-                    data = bytes([random.randint(0, 255) for _ in range(chunk_size)])
-                    f.write(data)
-                if remainder:
-                    data = bytes([random.randint(0, 255) for _ in range(remainder)])
-                    f.write(data)
-            
+            FileGenerator.generate_corpus(os.path.dirname(filename) or '.',
+                                          [(os.path.basename(filename), int(size_mb * 1024 * 1024), '')],
+                                          seed=seed, profile=profile, workers=1, manifest=False, overwrite=True)
             logging.info(f"Successfully generated file: {filename} ({size_mb}MB)")
             return True
         except Exception as e:
@@ -29,7 +163,66 @@ class FileGenerator:
             return False
 
     @staticmethod
-    def generate_test_files(directory="files"):
+    def generate_corpus(directory, entries, seed=0, profile='random', workers=None, manifest=None,
+                        overwrite=False):
+        """Buat semua file di entries [(nama, ukuran, group)] secara paralel lalu tulis manifest.
+
+        manifest: path manifest (None = default_manifest_path, False = tanpa manifest)
+        """
+        if profile not in PROFILES:
+            raise ValueError(f"profil tidak dikenal: {profile}")
+        os.makedirs(directory, exist_ok=True)
+        if manifest is None:
+            manifest = default_manifest_path(directory)
+        manifest_dir = os.path.dirname(os.path.abspath(manifest)) if manifest else None
+        if manifest_dir:
+            os.makedirs(manifest_dir, exist_ok=True)
+
+        def manifest_name(path):
+            return os.path.relpath(os.path.abspath(path), manifest_dir)
+
+        previous = read_manifest_rows(manifest) if manifest else {}
+
+        # file dibuat dengan ukuran akhir dulu, isinya diisi per segmen oleh worker
+        jobs, batch, batch_bytes = [], [], 0
+        for name, size, _ in entries:
+            path = os.path.join(directory, name)
+            # file lama hanya dipakai ulang bila dibuat dengan seed dan profil yang sama
+            old = previous.get(manifest_name(path)) if manifest else None
+            if not overwrite and os.path.exists(path) and os.path.getsize(path) == size and old \
+                    and old['profile'] == profile and old['seed'] == str(seed):
+                continue
+            with open(path, 'wb') as f:
+                f.truncate(size)
+            for offset in range(0, size, SEGMENT_SIZE):
+                batch.append((path, name, offset, min(SEGMENT_SIZE, size - offset), profile, seed))
+                batch_bytes += batch[-1][3]
+                # file kecil digabung per batch agar overhead antar proses tetap kecil
+                if batch_bytes >= SEGMENT_SIZE or len(batch) >= 1000:
+                    jobs.append(batch)
+                    batch, batch_bytes = [], 0
+        if batch:
+            jobs.append(batch)
+
+        if workers == 1 or len(jobs) <= 1:
+            written = sum(write_ranges(job) for job in jobs)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                written = sum(pool.map(write_ranges, jobs))
+        logging.info(f"Generated {written / (1024 * 1024):.1f} MB in {len(entries)} files under {directory}")
+
+        if manifest:
+            with open(manifest, 'w', newline='') as f:
+                writer = csv.writer(f)
+                writer.writerow(MANIFEST_COLUMNS)
+                for name, size, group in entries:
+                    writer.writerow([manifest_name(os.path.join(directory, name)), size, group, profile, seed])
+            logging.info(f"Manifest written to {manifest}")
+        return entries
+
+    @staticmethod
+    def generate_test_files(directory="files", seed=0, profile='random', workers=None, manifest=None,
+                            overwrite=False):
         """Generate standard test files for stress testing"""
         test_files = {
             'test_1mb': 1,
@@ -37,20 +230,9 @@ class FileGenerator:
             'test_50mb': 50,
             'test_100mb': 100
         }
-        os.makedirs(directory, exist_ok=True)
-        
-        for name, size in test_files.items():
-            filename = os.path.join(directory, f"{name}.dat")
-            if not os.path.exists(filename):
-                logging.info(f"Generating test file: {filename}")
-                FileGenerator.generate_file(filename, size)
-            else:
-                actual_size = os.path.getsize(filename) / (1024 * 1024)
-                if abs(actual_size - size) > 0.1: 
-                    logging.warning(f"Existing file {filename} has wrong size ({actual_size}MB), regenerating...")
-                    FileGenerator.generate_file(filename, size)
-                else:
-                    logging.info(f"Test file already exists with correct size: {filename}")
+        entries = [(f"{name}.dat", size * 1024 * 1024, name) for name, size in test_files.items()]
+        return FileGenerator.generate_corpus(directory, entries, seed=seed, profile=profile, workers=workers,
+                                             manifest=manifest, overwrite=overwrite)
 
     @staticmethod
     def cleanup_test_files(directory=""):
@@ -65,5 +247,27 @@ class FileGenerator:
             return False
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate corpus file uji")
+    parser.add_argument("--directory", default="files")
+    parser.add_argument("--groups", help="Spesifikasi corpus, mis. 'small=100000x4KB-64KB,huge=3x1GB' "
+                                         "(default: test_1mb/10mb/50mb/100mb)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--profile", choices=PROFILES, default="random")
+    parser.add_argument("--workers", type=int, help="Jumlah proses penulis (default: jumlah CPU)")
+    parser.add_argument("--manifest", help="Path manifest (default: <direktori>_manifest.csv di samping corpus)")
+    parser.add_argument("--overwrite", action="store_true", help="Tulis ulang file yang ukurannya sudah benar")
+    parser.add_argument("--cleanup", action="store_true", help="Hapus semua *.dat di direktori")
+    args = parser.parse_args()
+
     logging.basicConfig(level=logging.INFO)
-    FileGenerator.generate_test_files()
\ No newline at end of file
+    if args.cleanup:
+        FileGenerator.cleanup_test_files(args.directory)
+    elif args.groups:
+        FileGenerator.generate_corpus(args.directory, plan_corpus(parse_groups(args.groups), args.seed),
+                                      seed=args.seed, profile=args.profile, workers=args.workers,
+                                      manifest=args.manifest, overwrite=args.overwrite)
+    else:
+        FileGenerator.generate_test_files(args.directory, args.seed, args.profile, args.workers,
+                                          manifest=args.manifest, overwrite=args.overwrite)
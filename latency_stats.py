@@ -0,0 +1,220 @@
+import csv
+import math
+import os
+import time
+
+"""
+* pencatatan waktu per request di sisi client dan ringkasan persentilnya
+
+* setiap request menghasilkan satu record berisi:
+  - connect_ms  : waktu sampai koneksi TCP terbentuk
+  - ttfb_ms     : waktu dari awal request sampai byte pertama respons diterima
+  - transfer_ms : waktu memindahkan payload (kirim request + terima respons),
+                  tidak termasuk waktu menunggu server memproses
+  - total_ms    : durasi request dari awal sampai selesai
+  - outcome     : OK atau pesan kesalahan singkat
+"""
+
+PERCENTILES = (50, 90, 99)
+RAW_COLUMNS = ['operation', 'volume', 'client_workers', 'server_workers', 'request', 'connect_ms', 'ttfb_ms',
+               'transfer_ms', 'total_ms', 'bytes', 'outcome']
+
+
+class RequestTimer:
+    def __init__(self, operation=""):
+        self.operation = operation
+        self.start = time.perf_counter()
+        self.connected = None
+        self.sent = None
+        self.first_byte = None
+        self.end = None
+        self.nbytes = 0
+        self.outcome = "ERROR"
+
+    def mark_connected(self):
+        self.connected = time.perf_counter()
+
+    def mark_sent(self):
+        self.sent = time.perf_counter()
+
+    def mark_first_byte(self):
+        if self.first_byte is None:
+            self.first_byte = time.perf_counter()
+
+    def finish(self, ok, nbytes=0, error=None):
+        self.end = time.perf_counter()
+        self.nbytes = nbytes
+        if ok:
+            self.outcome = "OK"
+        elif isinstance(error, Exception):
+            self.outcome = (str(error) or type(error).__name__)[:80]
+        else:
+            self.outcome = str(error)[:80] if error else "ERROR"
+        return self.as_record()
+
+    def _ms(self, begin, finish):
+        if begin is None or finish is None:
+            return None
+        return round((finish - begin) * 1000, 3)
+
+    def as_record(self):
+        end = self.end if self.end is not None else time.perf_counter()
+        transfer = None
+        if self.connected is not None and self.sent is not None:
+            transfer = self.sent - self.connected
+            if self.first_byte is not None:
+                transfer += end - self.first_byte
+        return {
+            'operation': self.operation,
+            'connect_ms': self._ms(self.start, self.connected),
+            'ttfb_ms': self._ms(self.start, self.first_byte),
+            'transfer_ms': round(transfer * 1000, 3) if transfer is not None else None,
+            'total_ms': self._ms(self.start, end),
+            'bytes': self.nbytes,
+            'outcome': self.outcome,
+        }
+
+
+def percentile(sorted_values, p):
+    """Persentil dengan interpolasi linier; sorted_values harus sudah terurut"""
+    if not sorted_values:
+        return None
+    k = (len(sorted_values) - 1) * p / 100
+    lo = math.floor(k)
+    hi = math.ceil(k)
+    if lo == hi:
+        return sorted_values[lo]
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(records, field='total_ms', only_ok=True):
+    values = sorted(r[field] for r in records
+                    if r and r.get(field) is not None and (not only_ok or r['outcome'] == 'OK'))
+    summary = {f"p{p}": percentile(values, p) for p in PERCENTILES}
+    summary['max'] = values[-1] if values else None
+    summary['avg'] = sum(values) / len(values) if values else None
+    return summary
+
+
+def latency_columns(records):
+    """Kolom ringkasan latensi untuk satu baris hasil stress test"""
+    columns = {}
+    for field, prefix in (('total_ms', 'latency'), ('ttfb_ms', 'ttfb')):
+        summary = summarize(records, field)
+        for key in [f"p{p}" for p in PERCENTILES] + ['max']:
+            value = summary[key]
+            columns[f"{prefix}_{key}_ms"] = round(value, 2) if value is not None else ''
+    return columns
+
+
+LATENCY_COLUMNS = list(latency_columns([]).keys())
+
+
+def histogram(values, base_ms=1.0):
+    """Histogram dengan bucket kelipatan 2 (0-1ms, 1-2ms, 2-4ms, ...)"""
+    buckets = {}
+    for v in values:
+        if v is None:
+            continue
+        idx = 0 if v < base_ms else int(math.log2(v / base_ms)) + 1
+        buckets[idx] = buckets.get(idx, 0) + 1
+    result = []
+    for idx in range(max(buckets) + 1 if buckets else 0):
+        lo = 0 if idx == 0 else base_ms * 2 ** (idx - 1)
+        result.append((lo, base_ms * 2 ** idx, buckets.get(idx, 0)))
+    return result
+
+
+def append_csv(path, columns, rows):
+    new_file = not os.path.exists(path) or os.path.getsize(path) == 0
+    with open(path, 'a', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=columns, extrasaction='ignore')
+        if new_file:
+            writer.writeheader()
+        writer.writerows(rows)
+
+
+def write_raw(path, records, **case):
+    rows = [{**case, 'request': i, **r} for i, r in enumerate(records) if r]
+    append_csv(path, RAW_COLUMNS, rows)
+
+
+def write_histogram(path, records, **case):
+    rows = []
+    for field in ('total_ms', 'ttfb_ms'):
+        values = [r[field] for r in records if r and r['outcome'] == 'OK']
+        for lo, hi, count in histogram(values):
+            rows.append(dict(case, metric=field, bucket_lo_ms=lo, bucket_hi_ms=hi, count=count))
+    append_csv(path, list(case.keys()) + ['metric', 'bucket_lo_ms', 'bucket_hi_ms', 'count'], rows)
+
+
+# nilai kritis t dua sisi 95% untuk derajat kebebasan 1..30
+T_CRITICAL_95 = [12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+                 2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+                 2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042]
+
+
+def mean_ci(values):
+    """Rata-rata dan setengah lebar interval kepercayaan 95% (distribusi t)"""
+    values = [v for v in values if v is not None and v != '']
+    if not values:
+        return None, None
+    mean = sum(values) / len(values)
+    if len(values) < 2:
+        return mean, None
+    variance = sum((v - mean) ** 2 for v in values) / (len(values) - 1)
+    df = len(values) - 1
+    t = T_CRITICAL_95[df - 1] if df <= len(T_CRITICAL_95) else 1.96
+    return mean, t * math.sqrt(variance / len(values))
+
+
+def _betacf(a, b, x):
+    # continued fraction untuk incomplete beta (Lentz)
+    tiny = 1e-300
+    c = 1.0
+    d = 1.0 - (a + b) * x / (a + 1.0)
+    d = 1.0 / (d if abs(d) > tiny else tiny)
+    h = d
+    for m in range(1, 201):
+        for num in (m * (b - m) * x / ((a + 2 * m - 1) * (a + 2 * m)),
+                    -(a + m) * (a + b + m) * x / ((a + 2 * m) * (a + 2 * m + 1))):
+            d = 1.0 + num * d
+            d = 1.0 / (d if abs(d) > tiny else tiny)
+            c = 1.0 + num / c
+            c = c if abs(c) > tiny else tiny
+            h *= d * c
+        if abs(d * c - 1.0) < 1e-12:
+            break
+    return h
+
+
+def incomplete_beta(a, b, x):
+    """Regularized incomplete beta I_x(a, b)"""
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b)
+                     + a * math.log(x) + b * math.log(1 - x))
+    if x < (a + 1) / (a + b + 2):
+        return front * _betacf(a, b, x) / a
+    return 1.0 - front * _betacf(b, a, 1 - x) / b
+
+
+def t_two_sided_p(t, df):
+    """p-value dua sisi distribusi t Student (df boleh pecahan)"""
+    return incomplete_beta(df / 2, 0.5, df / (df + t * t))
+
+
+def welch_t_test(a, b):
+    """Uji t Welch untuk dua sampel; hasil (t, df, p) atau None bila sampel < 2"""
+    if len(a) < 2 or len(b) < 2:
+        return None
+    mean_a, mean_b = sum(a) / len(a), sum(b) / len(b)
+    va = sum((v - mean_a) ** 2 for v in a) / (len(a) - 1) / len(a)
+    vb = sum((v - mean_b) ** 2 for v in b) / (len(b) - 1) / len(b)
+    if va + vb == 0:
+        return (0.0, float(len(a) + len(b) - 2), 1.0 if mean_a == mean_b else 0.0)
+    t = (mean_b - mean_a) / math.sqrt(va + vb)
+    df = (va + vb) ** 2 / (va ** 2 / (len(a) - 1) + vb ** 2 / (len(b) - 1))
+    return t, df, t_two_sided_p(t, df)
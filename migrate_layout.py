@@ -0,0 +1,60 @@
+import os
+import sys
+import logging
+import argparse
+
+from file_interface import LAYOUTS, shard_path
+
+
+def target_path(root, filename, layout, depth):
+    if layout == 'sharded':
+        return os.path.join(root, shard_path(filename, depth))
+    return os.path.join(root, filename)
+
+
+def migrate(directory="files", layout="sharded", depth=2):
+    """Pindahkan file di directory (flat maupun sharded) ke layout tujuan.
+
+    Proses hanya memakai os.rename di filesystem yang sama, sehingga aman
+    dijalankan ulang bila sempat terhenti di tengah jalan.
+    """
+    root = os.path.abspath(directory)
+    moved = skipped = 0
+
+    for current_dir, _, filenames in list(os.walk(root)):
+        for filename in filenames:
+            if filename.startswith('.'):
+                continue
+            source = os.path.join(current_dir, filename)
+            target = target_path(root, filename, layout, depth)
+            if source == target:
+                continue
+            if os.path.exists(target):
+                logging.warning(f"Lewati {source}: {target} sudah ada")
+                skipped += 1
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.rename(source, target)
+            moved += 1
+
+    # hapus direktori shard yang sudah kosong, dari yang paling dalam
+    for current_dir, _, _ in sorted(os.walk(root), key=lambda w: -len(w[0])):
+        if current_dir != root and not os.listdir(current_dir):
+            os.rmdir(current_dir)
+
+    logging.warning(f"Migrasi ke {layout} selesai: {moved} dipindah, {skipped} dilewati")
+    return moved, skipped
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Konversi layout direktori file server secara in-place")
+    parser.add_argument("--directory", default="files")
+    parser.add_argument("--layout", choices=LAYOUTS, default="sharded")
+    parser.add_argument("--depth", type=int, choices=[1, 2, 3], default=2)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    if not os.path.isdir(args.directory):
+        print(f"Direktori {args.directory} tidak ditemukan")
+        sys.exit(1)
+    migrate(args.directory, args.layout, args.depth)
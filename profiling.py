@@ -0,0 +1,252 @@
+import os
+import json
+import time
+import signal
+import pstats
+import cProfile
+import threading
+import tracemalloc
+import contextlib
+import multiprocessing
+import multiprocessing.util
+
+"""
+* profiling opsional untuk semua varian server
+
+* default mati; aktifkan dengan FILE_SERVER_PROFILE=1, kirim SIGUSR1 ke proses
+  server (toggle), atau perintah admin PROFILE ON|OFF|DUMP|STATUS
+* saat aktif, setiap koneksi dijalankan di bawah cProfile, alokasi dilacak
+  tracemalloc, dan fase recv/parse/disk/encode/send dijumlahkan waktunya
+* status on/off dibagi lewat multiprocessing.Value, sehingga semua worker
+  processpool ikut berubah; worker menyinkronkan diri saat menangani
+  koneksi berikutnya, lalu menulis file per worker di direktori profil:
+    worker_<pid>_<n>.prof        -> pstats, bisa digabung
+    worker_<pid>_<n>.phases.json -> {fase: [jumlah, total detik]}
+    worker_<pid>_<n>.tracemalloc -> snapshot tracemalloc
+* cProfile hanya aktif untuk satu koneksi per proses pada satu waktu (Python
+  3.12+ menolak dua profiler aktif bersamaan); koneksi lain yang berjalan
+  bersamaan tetap diukur timer fasenya tetapi tidak masuk pstats, sehingga
+  pada threadpool/thread server pstats adalah sampel dari koneksi yang ada
+* worker yang keluar (mis. pool lama setelah resize) menulis hasilnya dulu
+* gabungkan hasil semua worker dengan: python profiling.py merge <direktori>
+"""
+
+PHASES = ('recv', 'parse', 'disk', 'encode', 'send')
+
+
+class ProfileControl:
+    """Status profiling yang dibagi ke semua thread/proses worker (seperti ServerStats)"""
+    def __init__(self, context=None, enabled=None, directory=None):
+        context = context or multiprocessing
+        if enabled is None:
+            enabled = os.environ.get('FILE_SERVER_PROFILE', '0') not in ('', '0')
+        self.enabled = context.Value('b', int(enabled))
+        # dinaikkan oleh PROFILE DUMP; worker yang melihat nilai baru menulis hasilnya
+        self.generation = context.Value('q', 0)
+        self.directory = os.path.abspath(directory or os.environ.get('FILE_SERVER_PROFILE_DIR', 'profiles'))
+
+    def set(self, enabled):
+        self.enabled.value = int(enabled)
+
+    def toggle(self):
+        with self.enabled.get_lock():
+            self.enabled.value = 0 if self.enabled.value else 1
+        return bool(self.enabled.value)
+
+    def request_dump(self):
+        with self.generation.get_lock():
+            self.generation.value += 1
+
+
+class Profiler:
+    """Akumulator profil untuk satu proses worker"""
+    def __init__(self, control):
+        self.control = control
+        self.lock = threading.Lock()
+        self.active = False
+        self.generation = control.generation.value
+        self.sequence = 0
+        self.stats = None
+        self.phases = {}
+        # hanya satu cProfile aktif per proses
+        self.profile_slot = threading.Lock()
+
+    def sync(self):
+        enabled = bool(self.control.enabled.value)
+        generation = self.control.generation.value
+        with self.lock:
+            if enabled and not self.active:
+                self._start()
+            elif not enabled and self.active:
+                self._dump()
+                self._stop()
+            elif self.active and generation != self.generation:
+                self._dump()
+            self.generation = generation
+
+    def _start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+        self.stats = None
+        self.phases = {}
+        self.active = True
+
+    def _stop(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.active = False
+
+    def _dump(self):
+        os.makedirs(self.control.directory, exist_ok=True)
+        self.sequence += 1
+        base = os.path.join(self.control.directory, f"worker_{os.getpid()}_{self.sequence}")
+        if self.stats is not None:
+            self.stats.dump_stats(base + ".prof")
+        with open(base + ".phases.json", "w") as f:
+            json.dump(self.phases, f)
+        if tracemalloc.is_tracing():
+            # alokasi milik profiler sendiri tidak relevan
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, module.__file__) for module in (tracemalloc, pstats, cProfile)])
+            snapshot.dump(base + ".tracemalloc")
+        self.stats = None
+        self.phases = {}
+
+    @contextlib.contextmanager
+    def session(self):
+        """Bungkus penanganan satu koneksi; cProfile berlaku per thread"""
+        self.sync()
+        if not self.active or not self.profile_slot.acquire(blocking=False):
+            yield
+            return
+        try:
+            profile = cProfile.Profile()
+            profile.enable()
+            try:
+                yield
+            finally:
+                profile.disable()
+                with self.lock:
+                    if self.active:
+                        if self.stats is None:
+                            self.stats = pstats.Stats(profile)
+                        else:
+                            self.stats.add(profile)
+        finally:
+            self.profile_slot.release()
+
+    def final_dump(self):
+        """Tulis hasil yang tersisa saat proses worker keluar"""
+        with self.lock:
+            if self.active and (self.stats is not None or self.phases):
+                self._dump()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                entry = self.phases.setdefault(name, [0, 0.0])
+                entry[0] += 1
+                entry[1] += elapsed
+
+
+# satu profiler per proses; dibuat ulang di proses hasil fork/spawn
+_profiler = None
+_profiler_pid = None
+_disabled = contextlib.nullcontext()
+
+
+def setup(control):
+    global _profiler, _profiler_pid
+    _profiler = Profiler(control)
+    _profiler_pid = os.getpid()
+    # dijalankan multiprocessing saat worker keluar, juga worker pool lama yang dilepas setelah resize
+    multiprocessing.util.Finalize(_profiler, _profiler.final_dump, exitpriority=10)
+    return _profiler
+
+
+def current():
+    if _profiler is not None and _profiler_pid != os.getpid():
+        setup(_profiler.control)
+    return _profiler
+
+
+def session():
+    profiler = current()
+    return profiler.session() if profiler is not None else _disabled
+
+
+def phase(name):
+    """Timer fase; tanpa biaya berarti ketika profiling tidak aktif"""
+    profiler = _profiler
+    if profiler is None or not profiler.active:
+        return _disabled
+    return profiler.phase(name)
+
+
+def install_signal_handler(control):
+    """SIGUSR1 membalik status profiling (hanya bisa dipasang dari main thread)"""
+    if not hasattr(signal, 'SIGUSR1'):
+        return
+
+    def handler(signum, frame):
+        enabled = control.toggle()
+        print(f"[PROFILE] profiling {'aktif' if enabled else 'nonaktif'}, hasil di {control.directory}", flush=True)
+
+    signal.signal(signal.SIGUSR1, handler)
+
+
+def merge(directory, output=None, top=25):
+    """Gabungkan file profil semua worker dan tampilkan ringkasannya"""
+    names = sorted(os.listdir(directory))
+    profiles = [os.path.join(directory, n) for n in names if n.endswith(".prof")]
+    if profiles:
+        stats = pstats.Stats(*profiles)
+        if output:
+            stats.dump_stats(output)
+            print(f"[INFO] Profil gabungan disimpan di {output}")
+        stats.sort_stats("cumulative").print_stats(top)
+
+    phases = {}
+    for name in names:
+        if name.endswith(".phases.json"):
+            with open(os.path.join(directory, name)) as f:
+                for key, (count, total) in json.load(f).items():
+                    entry = phases.setdefault(key, [0, 0.0])
+                    entry[0] += count
+                    entry[1] += total
+    if phases:
+        print(f"{'fase':<8}{'jumlah':>10}{'total (s)':>12}{'rata-rata (ms)':>16}")
+        for key in sorted(phases, key=lambda k: -phases[k][1]):
+            count, total = phases[key]
+            print(f"{key:<8}{count:>10}{total:>12.3f}{total / count * 1000 if count else 0:>16.3f}")
+
+    allocations = {}
+    for name in names:
+        if name.endswith(".tracemalloc"):
+            snapshot = tracemalloc.Snapshot.load(os.path.join(directory, name))
+            for stat in snapshot.statistics("lineno"):
+                key = str(stat.traceback)
+                allocations[key] = allocations.get(key, 0) + stat.size
+    if allocations:
+        print("\nAlokasi memori terbesar (semua worker):")
+        for key, size in sorted(allocations.items(), key=lambda kv: -kv[1])[:10]:
+            print(f"{size / 1024:>12.1f} KB  {key}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Gabungkan hasil profiling server")
+    sub = parser.add_subparsers(dest="command", required=True)
+    merge_parser = sub.add_parser("merge")
+    merge_parser.add_argument("directory", nargs="?", default="profiles")
+    merge_parser.add_argument("--output", help="Simpan profil gabungan (pstats)")
+    merge_parser.add_argument("--top", type=int, default=25)
+    args = parser.parse_args()
+
+    merge(args.directory, args.output, args.top)
@@ -0,0 +1,220 @@
+import os
+import csv
+import asyncio
+import argparse
+import tempfile
+
+from file_client_async import AsyncFileTransferClient, raise_fd_limit
+from latency_stats import RequestTimer, PERCENTILES, summarize, write_raw
+from traffic_trace import read_trace
+
+SUMMARY_COLUMNS = ['command', 'requests', 'client_fail', 'status_mismatch'] + \
+                  [f"latency_p{p}_ms" for p in PERCENTILES] + ['latency_max_ms', 'lag_p99_ms', 'bytes']
+WRITE_CHUNK = 1024 * 1024
+
+
+def write_sized_file(path, size):
+    if os.path.exists(path) and os.path.getsize(path) == size:
+        return
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        remaining = size
+        while remaining > 0:
+            n = min(WRITE_CHUNK, remaining)
+            f.write(os.urandom(n))
+            remaining -= n
+
+
+def entry_file_sizes(entry):
+    """Ukuran per file untuk satu entry trace (perintah batch dibagi rata)"""
+    if not entry['files']:
+        return {}
+    per_file = entry['size'] // len(entry['files'])
+    return {name: per_file for name in entry['files']}
+
+
+def is_pattern(name):
+    # param MGET/MDELETE disimpan apa adanya di trace, termasuk pola glob
+    return any(ch in name for ch in '*?[')
+
+
+class TraceReplayer:
+    """Memutar ulang trace server terhadap varian server mana pun.
+
+    Jadwal kirim mengikuti selisih timestamp di trace dibagi speed; dengan
+    speed None semua request dikirim secepat mungkin (dibatasi concurrency).
+    """
+    def __init__(self, server_ip, server_port, workdir):
+        self.client = AsyncFileTransferClient(server_ip, server_port)
+        self.source_dir = os.path.abspath(os.path.join(workdir, 'client'))
+        self.download_dir = os.path.join(workdir, 'downloads')
+        self.records = []
+
+    def local_path(self, name):
+        return os.path.join(self.source_dir, name)
+
+    def plan_files(self, entries):
+        """File lokal untuk upload ({path absolut: ukuran}) dan file yang harus sudah ada di server sebelum replay"""
+        local, seed, uploaded = {}, {}, set()
+        for entry in entries:
+            sizes = entry_file_sizes(entry)
+            if entry['command'] in ('upload', 'mupload'):
+                for name, size in sizes.items():
+                    local[self.local_path(name)] = max(size, local.get(self.local_path(name), 0))
+                uploaded.update(sizes)
+            elif entry['command'] in ('get', 'mget', 'delete', 'mdelete') and entry['status'] == 'OK':
+                # file yang dibaca/dihapus sebelum pernah diupload di trace
+                for name, size in sizes.items():
+                    if name not in uploaded and not is_pattern(name):
+                        seed[name] = max(size if entry['command'] == 'get' else 0, seed.get(name, 0))
+        for name, size in seed.items():
+            local[self.local_path(name)] = max(size, local.get(self.local_path(name), 0))
+        return local, seed
+
+    async def prepare(self, entries):
+        os.makedirs(self.download_dir, exist_ok=True)
+        local, seed = self.plan_files(entries)
+        for path, size in local.items():
+            write_sized_file(path, size)
+        print(f"[INFO] {len(local)} file lokal disiapkan, {len(seed)} file diunggah ke server sebelum replay")
+
+        semaphore = asyncio.Semaphore(16)
+
+        async def seed_one(name):
+            async with semaphore:
+                ok = (await self.client.upload_file(self.local_path(name)))[0]
+                if not ok:
+                    print(f"[WARNING] Gagal menyiapkan {name} di server")
+
+        await asyncio.gather(*(seed_one(name) for name in seed))
+
+    async def timed_command(self, command, coroutine):
+        timer = RequestTimer(command)
+        try:
+            result = await coroutine
+        except Exception as err:
+            return timer.finish(False, error=err)
+        # download_many/upload_many: (ok, durasi, bytes); delete_many: (ok, data)
+        if len(result) > 2:
+            return timer.finish(result[0], result[2], error="batch tidak lengkap")
+        return timer.finish(result[0], error=result[1])
+
+    async def run_entry(self, entry):
+        command, files = entry['command'], entry['files']
+        if command == 'get':
+            return (await self.client.download_file(files[0], self.download_dir))[3]
+        if command == 'upload':
+            return (await self.client.upload_file(self.local_path(files[0])))[3]
+        if command == 'list':
+            timer = RequestTimer(command)
+            response = await self.client.send_request("LIST", timer)
+            return timer.finish(response.get("status") == "OK", error=response.get("data"))
+        if command == 'delete':
+            timer = RequestTimer(command)
+            response = await self.client.send_request(f"DELETE {files[0]}", timer)
+            return timer.finish(response.get("status") == "OK", error=response.get("data"))
+        if command == 'mget':
+            return await self.timed_command(command, self.client.download_many(files, self.download_dir))
+        if command == 'mupload':
+            return await self.timed_command(command, self.client.upload_many([self.local_path(name) for name in files]))
+        if command == 'mdelete':
+            return await self.timed_command(command, self.client.delete_many(files))
+        return None
+
+    async def replay(self, entries, speed=1.0, concurrency=None):
+        loop = asyncio.get_running_loop()
+        limit = asyncio.Semaphore(concurrency) if concurrency else None
+        t0 = loop.time() + 0.05
+        trace_start = entries[0]['ts'] if entries else 0
+
+        async def play(entry, intended):
+            if limit:
+                await limit.acquire()
+            try:
+                lag = loop.time() - intended
+                record = await self.run_entry(entry)
+            finally:
+                if limit:
+                    limit.release()
+            if record is None:
+                return None
+            record = dict(record, operation=entry['command'], lag_ms=round(lag * 1000, 3) if speed else None,
+                          expected=entry['status'])
+            return record
+
+        tasks = []
+        for entry in entries:
+            intended = t0 + ((entry['ts'] - trace_start) / speed if speed else 0)
+            delay = intended - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(play(entry, intended)))
+        self.records = [r for r in await asyncio.gather(*tasks) if r]
+        return loop.time() - t0
+
+    def report(self, elapsed, trace_duration):
+        rows = []
+        for command in sorted({r['operation'] for r in self.records}):
+            records = [r for r in self.records if r['operation'] == command]
+            latency = summarize(records)
+            lag = summarize(records, 'lag_ms', only_ok=False)
+            row = {
+                'command': command,
+                'requests': len(records),
+                'client_fail': sum(1 for r in records if r['outcome'] != 'OK'),
+                'status_mismatch': sum(1 for r in records if (r['outcome'] == 'OK') != (r['expected'] == 'OK')),
+                'bytes': sum(r['bytes'] for r in records if r['outcome'] == 'OK'),
+            }
+            for key in [f"p{p}" for p in PERCENTILES] + ['max']:
+                row[f"latency_{key}_ms"] = round(latency[key], 2) if latency[key] is not None else ''
+            row['lag_p99_ms'] = round(lag['p99'], 2) if lag['p99'] is not None else ''
+            rows.append(row)
+
+        print(f"\nReplay selesai dalam {elapsed:.2f} detik (durasi trace {trace_duration:.2f} detik)")
+        print(f"{'command':<9}{'n':>7}{'gagal':>7}{'beda':>6}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}{'lag p99':>10}")
+        for row in rows:
+            print(f"{row['command']:<9}{row['requests']:>7}{row['client_fail']:>7}{row['status_mismatch']:>6}"
+                  f"{row['latency_p50_ms']:>10}{row['latency_p90_ms']:>10}{row['latency_p99_ms']:>10}"
+                  f"{row['latency_max_ms']:>10}{row['lag_p99_ms']:>10}")
+        return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Putar ulang trace request server")
+    parser.add_argument("trace", help="File trace hasil FILE_SERVER_TRACE")
+    parser.add_argument("--server-ip", default="172.16.16.101")
+    parser.add_argument("--server-port", type=int, default=7778)
+    parser.add_argument("--speed", type=float, default=1.0, help="Kelipatan kecepatan (2 = dua kali lebih cepat)")
+    parser.add_argument("--asap", action="store_true", help="Abaikan jeda di trace, kirim secepat mungkin")
+    parser.add_argument("--concurrency", type=int, help="Batas request yang berjalan bersamaan")
+    parser.add_argument("--workdir", help="Direktori file lokal (default: direktori sementara)")
+    parser.add_argument("--skip-prepare", action="store_true", help="Jangan buat/unggah file yang dibutuhkan")
+    parser.add_argument("--raw-output", help="CSV timing per request")
+    parser.add_argument("--output", help="CSV ringkasan per command")
+    args = parser.parse_args()
+
+    entries = read_trace(args.trace)
+    if not entries:
+        print("[ERROR] Trace kosong")
+        exit(1)
+
+    raise_fd_limit()
+    workdir = args.workdir or tempfile.mkdtemp(prefix="replay_")
+    replayer = TraceReplayer(args.server_ip, args.server_port, workdir)
+
+    if not args.skip_prepare:
+        asyncio.run(replayer.prepare(entries))
+    speed = None if args.asap else args.speed
+    print(f"[INFO] Memutar {len(entries)} request " + ("secepat mungkin" if speed is None else f"pada {speed}x"))
+    elapsed = asyncio.run(replayer.replay(entries, speed, args.concurrency))
+    rows = replayer.report(elapsed, entries[-1]['ts'] - entries[0]['ts'])
+
+    if args.raw_output:
+        write_raw(args.raw_output, replayer.records, volume='', client_workers=args.concurrency or '',
+                  server_workers=f"{speed}x" if speed else "asap")
+    if args.output:
+        with open(args.output, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=SUMMARY_COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"[INFO] Results exported to {args.output}")
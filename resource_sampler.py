@@ -0,0 +1,198 @@
+import os
+import csv
+import time
+import threading
+
+"""
+* sampling pemakaian resource proses server (beserta proses anaknya) dari /proc
+
+* hanya bisa dipakai bila server berjalan di mesin yang sama dengan stress
+  test (Linux); PID server diberikan lewat --server-pid
+* tiap sampel berisi:
+  - cpu_percent     : total CPU semua proses (100 = satu core penuh)
+  - thread_cpu_max  : CPU thread tersibuk, untuk melihat satu thread yang jenuh
+  - rss_mb, fds, threads, processes
+  - ctx_switches_ps : context switch (voluntary + involuntary) per detik
+  - sock_queue_kb   : isi antrian kirim+terima socket TCP milik server
+"""
+
+CLK_TCK = os.sysconf('SC_CLK_TCK') if hasattr(os, 'sysconf') else 100
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+SAMPLE_COLUMNS = ['elapsed', 'cpu_percent', 'thread_cpu_max', 'rss_mb', 'fds', 'threads', 'processes',
+                  'ctx_switches_ps', 'sock_queue_kb']
+RESOURCE_COLUMNS = ['cpu_avg', 'cpu_peak', 'thread_cpu_peak', 'rss_avg_mb', 'rss_peak_mb', 'fds_peak',
+                    'threads_peak', 'ctx_switches_ps_avg', 'sock_queue_peak_kb']
+
+
+def read_stat(path):
+    """(ppid, utime+stime dalam tick, jumlah thread) dari file stat /proc"""
+    with open(path) as f:
+        data = f.read()
+    # nama proses di dalam kurung boleh mengandung spasi
+    fields = data[data.rindex(')') + 2:].split()
+    return int(fields[1]), int(fields[11]) + int(fields[12]), int(fields[17])
+
+
+def process_tree(root):
+    children = {}
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            ppid = read_stat(f'/proc/{entry}/stat')[0]
+        except (OSError, ValueError, IndexError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    tree, pending = [], [root]
+    while pending:
+        pid = pending.pop()
+        tree.append(pid)
+        pending.extend(children.get(pid, []))
+    return tree
+
+
+def context_switches(pid):
+    total = 0
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith(('voluntary_ctxt_switches', 'nonvoluntary_ctxt_switches')):
+                total += int(line.split()[1])
+    return total
+
+
+def socket_queues(pid):
+    """{inode: tx_queue + rx_queue} untuk semua socket TCP di network namespace proses"""
+    queues = {}
+    for name in ('tcp', 'tcp6'):
+        try:
+            with open(f'/proc/{pid}/net/{name}') as f:
+                next(f)
+                for line in f:
+                    fields = line.split()
+                    tx, rx = fields[4].split(':')
+                    queues[fields[9]] = int(tx, 16) + int(rx, 16)
+        except (OSError, StopIteration):
+            pass
+    return queues
+
+
+class ResourceSampler:
+    """Thread yang mengambil sampel /proc setiap interval selama satu test case"""
+    def __init__(self, pid, interval=0.5):
+        self.pid = pid
+        self.interval = interval
+        self.samples = []
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.prev = None
+
+    def start(self):
+        self.samples = []
+        self.stop_event.clear()
+        self.prev = self.read_counters()
+        self.started = time.perf_counter()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+        # sampel terakhir supaya case yang lebih pendek dari interval tetap tercatat
+        self.take_sample()
+        return self.summary()
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            self.take_sample()
+
+    def read_counters(self):
+        counters = dict(time=time.perf_counter(), cpu=0, threads={}, rss=0, fds=0, nthreads=0, ctx=0,
+                        processes=0, sock_queue=0)
+        queues = None
+        for pid in process_tree(self.pid):
+            try:
+                _, ticks, nthreads = read_stat(f'/proc/{pid}/stat')
+                with open(f'/proc/{pid}/statm') as f:
+                    counters['rss'] += int(f.read().split()[1]) * PAGE_SIZE
+                counters['cpu'] += ticks
+                counters['nthreads'] += nthreads
+                counters['ctx'] += context_switches(pid)
+                for tid in os.listdir(f'/proc/{pid}/task'):
+                    try:
+                        counters['threads'][int(tid)] = read_stat(f'/proc/{pid}/task/{tid}/stat')[1]
+                    except (OSError, ValueError, IndexError):
+                        pass
+                fds = os.listdir(f'/proc/{pid}/fd')
+                counters['fds'] += len(fds)
+                if queues is None:
+                    queues = socket_queues(pid)
+                for fd in fds:
+                    try:
+                        target = os.readlink(f'/proc/{pid}/fd/{fd}')
+                    except OSError:
+                        continue
+                    if target.startswith('socket:['):
+                        counters['sock_queue'] += queues.get(target[8:-1], 0)
+                counters['processes'] += 1
+            except (OSError, ValueError, IndexError):
+                # proses/thread bisa selesai di tengah pembacaan
+                continue
+        return counters
+
+    def take_sample(self):
+        now = self.read_counters()
+        prev, self.prev = self.prev, now
+        elapsed = now['time'] - prev['time']
+        if elapsed <= 0 or now['processes'] == 0:
+            return None
+        thread_ticks = [ticks - prev['threads'].get(tid, ticks) for tid, ticks in now['threads'].items()]
+        sample = {
+            'elapsed': round(now['time'] - self.started, 3),
+            'cpu_percent': round(max(now['cpu'] - prev['cpu'], 0) / CLK_TCK / elapsed * 100, 1),
+            'thread_cpu_max': round(max(thread_ticks, default=0) / CLK_TCK / elapsed * 100, 1),
+            'rss_mb': round(now['rss'] / (1024 * 1024), 1),
+            'fds': now['fds'],
+            'threads': now['nthreads'],
+            'processes': now['processes'],
+            'ctx_switches_ps': round(max(now['ctx'] - prev['ctx'], 0) / elapsed, 1),
+            'sock_queue_kb': round(now['sock_queue'] / 1024, 1),
+        }
+        self.samples.append(sample)
+        return sample
+
+    def summary(self):
+        """Puncak dan rata-rata untuk ditempel ke baris hasil stress test"""
+        if not self.samples:
+            return {column: '' for column in RESOURCE_COLUMNS}
+
+        def avg(key):
+            return round(sum(s[key] for s in self.samples) / len(self.samples), 1)
+
+        def peak(key):
+            return max(s[key] for s in self.samples)
+
+        return {
+            'cpu_avg': avg('cpu_percent'),
+            'cpu_peak': peak('cpu_percent'),
+            'thread_cpu_peak': peak('thread_cpu_max'),
+            'rss_avg_mb': avg('rss_mb'),
+            'rss_peak_mb': peak('rss_mb'),
+            'fds_peak': peak('fds'),
+            'threads_peak': peak('threads'),
+            'ctx_switches_ps_avg': avg('ctx_switches_ps'),
+            'sock_queue_peak_kb': peak('sock_queue_kb'),
+        }
+
+
+def write_series(directory, samples, **case):
+    """Time-series sampel satu test case; nama file dari nilai case, mis. download_10MB_5_50.csv"""
+    os.makedirs(directory, exist_ok=True)
+    name = "_".join(str(v).replace(" ", "") for v in case.values()) + ".csv"
+    path = os.path.join(directory, name)
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=SAMPLE_COLUMNS)
+        writer.writeheader()
+        writer.writerows(samples)
+    return path
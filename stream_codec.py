@@ -0,0 +1,113 @@
+import os
+import json
+import base64
+import tempfile
+
+"""
+* helper untuk transfer GET/UPLOAD secara bertahap di sisi client
+
+* isi file di protokol dikirim sebagai base64 di dalam JSON, sehingga
+encode/decode bisa dilakukan per potongan tanpa pernah menyimpan
+seluruh file di memori
+* hasil GET ditulis ke file sementara di direktori tujuan dan baru di-rename
+ke nama akhirnya setelah data_file lengkap; download yang terputus tidak
+meninggalkan file terpotong
+"""
+
+# kelipatan 3 supaya hasil base64 tiap potongan bisa langsung disambung
+UPLOAD_CHUNK = 3 * 256 * 1024
+RECV_CHUNK = 64 * 1024
+
+
+def encode_file_chunks(fp, chunk_size=UPLOAD_CHUNK):
+    while True:
+        data = fp.read(chunk_size)
+        if not data:
+            break
+        yield base64.b64encode(data)
+
+
+class Base64StreamDecoder:
+    def __init__(self, out):
+        self.out = out
+        self.pending = b""
+        self.size = 0
+
+    def feed(self, data):
+        data = self.pending + data
+        cut = len(data) - len(data) % 4
+        decoded = base64.b64decode(data[:cut])
+        self.out.write(decoded)
+        self.size += len(decoded)
+        self.pending = data[cut:]
+
+    def close(self):
+        if self.pending:
+            decoded = base64.b64decode(self.pending)
+            self.out.write(decoded)
+            self.size += len(decoded)
+            self.pending = b""
+
+
+class GetResponseParser:
+    """Parser respons GET yang diumpan potongan bytes dari socket.
+
+    Begitu field data_file mulai, isinya didekode dan ditulis ke file
+    sementara di samping path target_path(namafile), lalu di-rename ke path
+    itu saat selesai. abort() menghapus file sementara bila belum selesai.
+    Respons ERROR diparse seperti biasa.
+    """
+    MARKER = b'"data_file": "'
+
+    def __init__(self, target_path):
+        self.target_path = target_path
+        self.buffer = b""
+        self.response = None
+        self.target = None
+        self.temp_path = None
+        self.out = None
+        self.decoder = None
+        self.done = False
+
+    @property
+    def size(self):
+        return self.decoder.size if self.decoder else 0
+
+    def feed(self, data):
+        if self.decoder is None:
+            self.buffer += data
+            idx = self.buffer.find(self.MARKER)
+            if idx < 0:
+                if b"\r\n\r\n" in self.buffer:
+                    self.response = json.loads(self.buffer.split(b"\r\n\r\n")[0])
+                    self.done = True
+                return self.done
+            # field lain sudah lengkap sebelum data_file (urutan dict dijaga json.dumps)
+            self.response = json.loads(self.buffer[:idx].rstrip().rstrip(b",") + b"}")
+            self.target = self.target_path(self.response["data_namafile"])
+            fd, self.temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(self.target)}.", suffix='.tmp',
+                                                  dir=os.path.dirname(self.target) or '.')
+            self.out = os.fdopen(fd, 'wb')
+            self.decoder = Base64StreamDecoder(self.out)
+            data = self.buffer[idx + len(self.MARKER):]
+            self.buffer = b""
+
+        end = data.find(b'"')
+        if end < 0:
+            self.decoder.feed(data)
+            return False
+        self.decoder.feed(data[:end])
+        self.decoder.close()
+        self.out.close()
+        os.chmod(self.temp_path, 0o644)
+        os.replace(self.temp_path, self.target)
+        self.temp_path = None
+        self.done = True
+        return True
+
+    def abort(self):
+        if self.out is not None and not self.out.closed:
+            self.out.close()
+        if self.temp_path is not None and os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+        self.temp_path = None
@@ -0,0 +1,46 @@
+import os
+import time
+import asyncio
+from file_client_async import AsyncFileTransferClient, raise_fd_limit
+from stress_test_threadpool import StressTester, build_parser, run_from_args
+
+
+class AsyncStressTester(StressTester):
+    """StressTester yang mensimulasikan client sebagai coroutine, bukan thread.
+
+    Kolom hasil dan format CSV sama persis dengan stress_test_threadpool.py.
+    """
+    def execute_test(self, action, file_path, client_count, server_pool_size):
+        files = self.client_files(file_path, client_count)
+        size_in_bytes = sum(os.path.getsize(f) for f in files) // len(files)
+        print(f"\n{action.upper()} | File: {files[0]}{' ...' if len(set(files)) > 1 else ''} | Size: {size_in_bytes / (1024**2):.2f} MB | Clients: {client_count} | Server Workers: {server_pool_size}")
+
+        counters_before = self.server_counters()
+        sampler = self.start_sampler()
+        start = time.time()
+        results = asyncio.run(self.run_clients(action, files))
+        duration = time.time() - start
+        server_counts = self.server_delta(counters_before)
+        return self.record_result(action, size_in_bytes, client_count, server_pool_size, duration, results,
+                                  server_counts, sampler)
+
+    async def run_clients(self, action, files):
+        client_instance = AsyncFileTransferClient(self.server_ip, self.server_port)
+        if action == "upload":
+            tasks = [client_instance.upload_file(f) for f in files]
+        else:
+            tasks = [client_instance.download_file(f) for f in files]
+        return await asyncio.gather(*tasks)
+
+
+if __name__ == "__main__":
+    parser = build_parser("Async Stress Test for File Transfer Server", "stress_test_async_results.csv")
+    parser.add_argument("--client-levels", default="1,5,50,500,1000",
+                        help="Jumlah client untuk suite lengkap, dipisah koma")
+    args = parser.parse_args()
+    raise_fd_limit()
+
+    tester = AsyncStressTester(args.server_ip, args.server_port)
+    tester.client_levels = [int(x) for x in args.client_levels.split(",")]
+    tester.server_levels = [args.server_workers]
+    run_from_args(tester, args)
@@ -0,0 +1,170 @@
+import os
+import csv
+import random
+import asyncio
+from datetime import datetime
+from file_client_async import AsyncFileTransferClient, execute_task, raise_fd_limit
+from latency_stats import LATENCY_COLUMNS, latency_columns, summarize, write_raw
+
+
+def arrival_schedule(rate, duration, distribution="poisson", seed=None):
+    """Offset waktu kirim (detik) untuk laju rate request/detik selama duration"""
+    rng = random.Random(seed)
+    offsets = []
+    t = 0.0
+    while True:
+        t += rng.expovariate(rate) if distribution == "poisson" else 1.0 / rate
+        if t >= duration:
+            return offsets
+        offsets.append(t)
+
+
+class OpenLoopStressTester:
+    """Load generator open-loop: request dikirim sesuai jadwal, bukan menunggu respons.
+
+    Latensi diukur dari waktu kirim yang dijadwalkan, sehingga antrian di
+    server (coordinated omission) ikut terlihat di persentil.
+    """
+    def __init__(self, server_ip, server_port):
+        self.server_ip = server_ip
+        self.server_port = server_port
+        self.test_data = []
+        self.raw_output = None
+        self.test_file_map = {
+            'small': 'test_10mb.dat',
+            'medium': 'test_50mb.dat',
+            'large': 'test_100mb.dat'
+        }
+
+    async def timed_request(self, client, action, file_path, intended):
+        loop = asyncio.get_running_loop()
+        lag = loop.time() - intended
+        ok, _, size, record = await execute_task(client, (action, file_path))
+        record = dict(record or {'operation': action, 'ttfb_ms': None, 'outcome': 'OK' if ok else 'ERROR'})
+        record['service_ms'] = record.get('total_ms')
+        record['total_ms'] = round((loop.time() - intended) * 1000, 3)
+        if record.get('ttfb_ms') is not None:
+            record['ttfb_ms'] = round(record['ttfb_ms'] + lag * 1000, 3)
+        return ok, size, record
+
+    async def run_schedule(self, action, file_path, offsets):
+        client = AsyncFileTransferClient(self.server_ip, self.server_port)
+        loop = asyncio.get_running_loop()
+        t0 = loop.time() + 0.05
+        tasks = []
+        for offset in offsets:
+            intended = t0 + offset
+            delay = intended - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(self.timed_request(client, action, file_path, intended)))
+        results = await asyncio.gather(*tasks)
+        return results, loop.time() - t0
+
+    def execute_rate(self, action, file_path, rate, duration, distribution, server_label, seed=None):
+        offsets = arrival_schedule(rate, duration, distribution, seed)
+        print(f"\n{action.upper()} | {server_label} | target {rate} req/s | {len(offsets)} request ({distribution})")
+
+        results, elapsed = asyncio.run(self.run_schedule(action, file_path, offsets))
+        records = [r[2] for r in results]
+        successful = sum(1 for r in results if r[0])
+        size_in_bytes = os.path.getsize(file_path) if action != "list" else 0
+        service = summarize(records, 'service_ms')
+
+        row = {
+            'timestamp': datetime.now().isoformat(),
+            'operation': action,
+            'volume': f"{size_in_bytes // (1024*1024)} MB",
+            'server': server_label,
+            'distribution': distribution,
+            'target_rps': rate,
+            'achieved_rps': round(successful / elapsed, 2) if elapsed > 0 else 0,
+            'sent': len(results),
+            'client_success': successful,
+            'client_fail': len(results) - successful,
+            'throughput': round(sum(r[1] for r in results if r[0]) / elapsed / (1024**2), 2) if elapsed > 0 else 0,
+            **latency_columns(records),
+            'service_p50_ms': round(service['p50'], 2) if service['p50'] is not None else '',
+            'service_p99_ms': round(service['p99'], 2) if service['p99'] is not None else '',
+        }
+        if self.raw_output:
+            write_raw(self.raw_output, records, operation=action, volume=row['volume'],
+                      client_workers=f"{rate}rps", server_workers=server_label)
+        self.test_data.append(row)
+        print(f"  achieved {row['achieved_rps']} req/s | gagal {row['client_fail']} | "
+              f"latensi p50 {row['latency_p50_ms']} p99 {row['latency_p99_ms']} max {row['latency_max_ms']} ms")
+        return row
+
+    def is_saturated(self, row, slo_ms, max_error_rate):
+        if row['sent'] == 0:
+            return False
+        if row['client_fail'] / row['sent'] > max_error_rate:
+            return True
+        if row['achieved_rps'] < 0.9 * row['target_rps']:
+            return True
+        return slo_ms is not None and row['latency_p99_ms'] != '' and row['latency_p99_ms'] > slo_ms
+
+    def ramp(self, action, file_path, rates, duration, distribution, server_label, slo_ms=None, max_error_rate=0.01):
+        """Naikkan laju bertahap sampai server jenuh; kembalikan laju terakhir yang masih sehat"""
+        sustained = None
+        for rate in rates:
+            row = self.execute_rate(action, file_path, rate, duration, distribution, server_label, seed=rate)
+            row['saturated'] = self.is_saturated(row, slo_ms, max_error_rate)
+            if row['saturated']:
+                print(f"[INFO] Jenuh pada {rate} req/s")
+                break
+            sustained = rate
+        print(f"[INFO] Laju maksimum yang masih sehat untuk {server_label}: {sustained} req/s")
+        return sustained
+
+    def export_to_csv(self, out_file="stress_test_openloop.csv"):
+        if not self.test_data:
+            print("[WARNING] No results to export.")
+            return False
+
+        columns = [
+            'timestamp', 'operation', 'volume', 'server', 'distribution', 'target_rps', 'achieved_rps',
+            'sent', 'client_success', 'client_fail', 'throughput'
+        ] + LATENCY_COLUMNS + ['service_p50_ms', 'service_p99_ms', 'saturated']
+
+        try:
+            with open(out_file, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=columns)
+                writer.writeheader()
+                writer.writerows(self.test_data)
+            print(f"[INFO] Results exported to {out_file}")
+            return True
+        except Exception as e:
+            print(f"[ERROR] Failed to write CSV: {e}")
+            return False
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Open-loop (constant arrival rate) stress test")
+    parser.add_argument("--server-ip", default="172.16.16.101")
+    parser.add_argument("--server-port", type=int, default=7778)
+    parser.add_argument("--server-label", default="threadpool", help="Nama varian server untuk kolom hasil")
+    parser.add_argument("--operation", choices=["upload", "download", "list"], default="download")
+    parser.add_argument("--file-size", choices=["small", "medium", "large"], default="small")
+    parser.add_argument("--rates", default="1,2,5,10,20,50,100,200", help="Laju (req/s) yang dicoba, naik bertahap")
+    parser.add_argument("--duration", type=float, default=10, help="Durasi tiap laju (detik)")
+    parser.add_argument("--distribution", choices=["poisson", "uniform"], default="poisson")
+    parser.add_argument("--slo-ms", type=float, help="Anggap jenuh bila p99 melebihi batas ini")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--raw-output", help="CSV timing per request")
+    parser.add_argument("--output", default="stress_test_openloop.csv")
+    args = parser.parse_args()
+
+    raise_fd_limit()
+    tester = OpenLoopStressTester(args.server_ip, args.server_port)
+    tester.raw_output = args.raw_output
+    test_file = tester.test_file_map[args.file_size]
+    if args.operation != "list" and not os.path.exists(test_file):
+        print(f"[ERROR] Missing required file: {test_file}")
+        exit(1)
+
+    tester.ramp(args.operation, test_file, [float(x) for x in args.rates.split(",")], args.duration,
+                args.distribution, args.server_label, args.slo_ms, args.max_error_rate)
+    tester.export_to_csv(args.output)
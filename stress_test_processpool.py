@@ -3,6 +3,10 @@ import time
 import csv
 from datetime import datetime
 from file_client_processpool import run_stress_test
+from file_client_threadpool import FileTransferClient
+from generator import load_manifest
+from latency_stats import LATENCY_COLUMNS, latency_columns, write_raw, write_histogram
+from resource_sampler import RESOURCE_COLUMNS, ResourceSampler, write_series
 
 class ProcessPoolStressAutomator:
     def __init__(self, ip_address, port_number):
@@ -14,21 +18,39 @@ class ProcessPoolStressAutomator:
             'medium': 'test_50mb.dat',
             'large': 'test_100mb.dat'
         }
+        self.raw_output = None
+        self.histogram_output = None
+        self.server_pid = None
+        self.sample_interval = 0.5
+        self.resource_series = None
+
+    def use_manifest(self, manifest_path):
+        """Ganti file_variants dengan group dari manifest corpus generator.py"""
+        self.file_variants = {group: files if len(files) > 1 else files[0]
+                              for group, files in load_manifest(manifest_path).items()}
 
     def verify_files_exist(self):
         """Cek apakah file pengujian tersedia"""
         for label, path in self.file_variants.items():
-            if not os.path.isfile(path):
-                print(f"File {path} tidak ditemukan.")
-                return False
+            for file_path in (path if isinstance(path, list) else [path]):
+                if not os.path.isfile(file_path):
+                    print(f"File {file_path} tidak ditemukan.")
+                    return False
         return True
 
     def execute_test_case(self, method, filepath, clients):
         """Lakukan satu pengujian stress menggunakan ProcessPoolExecutor"""
-        volume = os.path.getsize(filepath)
-        print(f"\n{method.upper()} | File: {filepath} | Ukuran: {volume / 1024 / 1024:.2f} MB | Worker: {clients}")
-
+        files = filepath if isinstance(filepath, list) else [filepath]
+        used = [files[i % len(files)] for i in range(clients)]
+        volume = sum(os.path.getsize(f) for f in used) // len(used)
+        print(f"\n{method.upper()} | File: {files[0]}{' ...' if len(files) > 1 else ''} | Ukuran: {volume / 1024 / 1024:.2f} MB | Worker: {clients}")
+
+        stats_client = FileTransferClient(self.ip, self.port)
+        ok_before, before = stats_client.fetch_server_stats()
+        # proses worker server ikut tercatat karena sampler membaca seluruh pohon proses
+        sampler = ResourceSampler(self.server_pid, self.sample_interval).start() if self.server_pid else None
         result = run_stress_test(self.ip, self.port, method, filepath, clients)
+        ok_after, after = stats_client.fetch_server_stats()
 
         success_count = result.get('successes', 0)
         fail_count = result.get('failures', 0)
@@ -41,9 +63,19 @@ class ProcessPoolStressAutomator:
             'throughput': round((result.get('throughput', 0) / (1024*1024)), 2),
             'client_success': success_count,
             'client_fail': fail_count,
-            'server_success': success_count,  
-            'server_fail': fail_count         
+            'server_success': after['success'] - before['success'] if ok_before and ok_after else '',
+            'server_fail': after['fail'] - before['fail'] if ok_before and ok_after else '',
+            **latency_columns(result.get('requests', []))
         }
+        case = dict(operation=method, volume=summary['volume'], client_workers=clients)
+        if sampler:
+            summary.update(sampler.stop())
+            if self.resource_series:
+                write_series(self.resource_series, sampler.samples, **case)
+        if self.raw_output:
+            write_raw(self.raw_output, result.get('requests', []), **case)
+        if self.histogram_output:
+            write_histogram(self.histogram_output, result.get('requests', []), **case)
 
         self.test_results.append(summary)
         self.display_test_summary(summary)
@@ -61,6 +93,12 @@ class ProcessPoolStressAutomator:
         print(f"Client Gagal:    {data['client_fail']}")
         print(f"Server Sukses:   {data['server_success']}")
         print(f"Server Gagal:    {data['server_fail']}")
+        if data['latency_max_ms'] != '':
+            print(f"Latensi p50/p99: {data['latency_p50_ms']} / {data['latency_p99_ms']} ms (max {data['latency_max_ms']} ms)")
+            print(f"TTFB p50/p99:    {data['ttfb_p50_ms']} / {data['ttfb_p99_ms']} ms (max {data['ttfb_max_ms']} ms)")
+        if data.get('cpu_peak', '') != '':
+            print(f"CPU avg/peak:    {data['cpu_avg']} / {data['cpu_peak']} % (thread tersibuk {data['thread_cpu_peak']} %)")
+            print(f"RSS avg/peak:    {data['rss_avg_mb']} / {data['rss_peak_mb']} MB")
 
     def run_all_combinations(self):
         """Eksekusi seluruh kombinasi pengujian"""
@@ -68,7 +106,7 @@ class ProcessPoolStressAutomator:
             return False
 
         methods = ['download', 'upload']
-        sizes = ['small', 'medium', 'large']
+        sizes = list(self.file_variants)
         client_counts = [1, 5, 50]
         total_tests = len(methods) * len(sizes) * len(client_counts)
         index = 1
@@ -93,7 +131,9 @@ class ProcessPoolStressAutomator:
             'timestamp', 'operation', 'volume', 'client_workers',
             'total_time', 'throughput', 'client_success', 'client_fail',
             'server_success', 'server_fail'
-        ]
+        ] + LATENCY_COLUMNS
+        if self.server_pid:
+            columns += RESOURCE_COLUMNS
 
         try:
             with open(output_file, 'w', newline='') as csv_out:
@@ -114,17 +154,33 @@ if __name__ == "__main__":
     parser.add_argument("--server-port", type=int, default=7779, help="Port server")
     parser.add_argument("--single-test", action="store_true", help="Jalankan satu pengujian saja")
     parser.add_argument("--operation", choices=["upload", "download"], help="Jenis operasi")
-    parser.add_argument("--file-size", choices=["small", "medium", "large"], help="Ukuran file")
+    parser.add_argument("--file-size", help="Ukuran file (small/medium/large, atau group dari --manifest)")
+    parser.add_argument("--manifest", help="Manifest corpus dari generator.py (path file relatif terhadap lokasi manifest)")
     parser.add_argument("--workers", type=int, help="Jumlah worker client")
     parser.add_argument("--output", default="stress_results_processpool.csv", help="Nama file hasil CSV")
+    parser.add_argument("--raw-output", help="CSV timing per request (ditambahkan per test case)")
+    parser.add_argument("--histogram-output", help="CSV histogram latensi per test case")
+    parser.add_argument("--server-pid", type=int, help="PID server lokal untuk sampling resource dari /proc")
+    parser.add_argument("--sample-interval", type=float, default=0.5, help="Interval sampling resource (detik)")
+    parser.add_argument("--resource-series", help="Direktori time-series resource per test case")
     args = parser.parse_args()
 
     executor = ProcessPoolStressAutomator(args.server_ip, args.server_port)
+    executor.raw_output = args.raw_output
+    executor.histogram_output = args.histogram_output
+    executor.server_pid = args.server_pid
+    executor.sample_interval = args.sample_interval
+    executor.resource_series = args.resource_series
+    if args.manifest:
+        executor.use_manifest(args.manifest)
 
     if args.single_test:
         if not all([args.operation, args.file_size, args.workers]):
             print("Error: Untuk pengujian tunggal, parameter --operation, --file-size, dan --workers wajib diisi.")
             exit(1)
+        if args.file_size not in executor.file_variants:
+            print(f"Error: ukuran file {args.file_size} tidak dikenal (pilihan: {', '.join(executor.file_variants)})")
+            exit(1)
         selected_file = executor.file_variants[args.file_size]
         executor.execute_test_case(args.operation, selected_file, args.workers)
     else:
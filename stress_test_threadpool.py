@@ -1,9 +1,13 @@
 import os
 import time
 import csv
+import argparse
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
 from file_client_threadpool import FileTransferClient  
+from generator import load_manifest
+from latency_stats import LATENCY_COLUMNS, latency_columns, write_raw, write_histogram
+from resource_sampler import RESOURCE_COLUMNS, ResourceSampler, write_series
 
 class StressTester:
     def __init__(self, server_ip, server_port):
@@ -15,37 +19,81 @@ class StressTester:
             'medium': 'test_50mb.dat',
             'large': 'test_100mb.dat'
         }
+        self.client_levels = [1, 5, 50]
+        self.server_levels = [50]
+        self.raw_output = None
+        self.histogram_output = None
+        # sampling /proc hanya bila server berjalan di mesin yang sama
+        self.server_pid = None
+        self.sample_interval = 0.5
+        self.resource_series = None
+
+    def use_manifest(self, manifest_path):
+        """Ganti test_file_map dengan group dari manifest corpus generator.py"""
+        self.test_file_map = {group: files if len(files) > 1 else files[0]
+                              for group, files in load_manifest(manifest_path).items()}
+
+    def client_files(self, file_path, client_count):
+        """File untuk tiap client; group berisi banyak file dibagi bergiliran"""
+        files = file_path if isinstance(file_path, list) else [file_path]
+        return [files[i % len(files)] for i in range(client_count)]
 
     def check_files(self):
         for label, path in self.test_file_map.items():
-            if not os.path.exists(path):
-                print(f"[ERROR] Missing required file: {path}")
-                return False
+            for file_path in (path if isinstance(path, list) else [path]):
+                if not os.path.exists(file_path):
+                    print(f"[ERROR] Missing required file: {file_path}")
+                    return False
         return True
 
     def execute_test(self, action, file_path, client_count, server_pool_size):
-        size_in_bytes = os.path.getsize(file_path)
-        print(f"\n{action.upper()} | File: {file_path} | Size: {size_in_bytes / (1024**2):.2f} MB | Clients: {client_count} | Server Threads: {server_pool_size}")
+        files = self.client_files(file_path, client_count)
+        size_in_bytes = sum(os.path.getsize(f) for f in files) // len(files)
+        print(f"\n{action.upper()} | File: {files[0]}{' ...' if len(set(files)) > 1 else ''} | Size: {size_in_bytes / (1024**2):.2f} MB | Clients: {client_count} | Server Threads: {server_pool_size}")
         
         client_instance = FileTransferClient(self.server_ip, self.server_port)
+        counters_before = self.server_counters()
+        sampler = self.start_sampler()
 
         start = time.time()
         with ThreadPoolExecutor(max_workers=client_count) as executor:
             tasks = []
-            for _ in range(client_count):
+            for client_file in files:
                 if action == "upload":
-                    tasks.append(executor.submit(client_instance.upload_file, file_path))
+                    tasks.append(executor.submit(client_instance.upload_file, client_file))
                 else:
-                    tasks.append(executor.submit(client_instance.download_file, file_path))
+                    tasks.append(executor.submit(client_instance.download_file, client_file))
 
             results = [task.result() for task in tasks]
 
         duration = time.time() - start
+        server_counts = self.server_delta(counters_before)
+        return self.record_result(action, size_in_bytes, client_count, server_pool_size, duration, results,
+                                  server_counts, sampler)
+
+    def start_sampler(self):
+        if not self.server_pid:
+            return None
+        return ResourceSampler(self.server_pid, self.sample_interval).start()
+
+    def server_counters(self):
+        ok, data = FileTransferClient(self.server_ip, self.server_port).fetch_server_stats()
+        return data if ok else None
+
+    def server_delta(self, before):
+        """Selisih counter STATS server selama test case; ('', '') bila server tidak mendukung"""
+        after = self.server_counters()
+        if before is None or after is None:
+            return '', ''
+        return after['success'] - before['success'], after['fail'] - before['fail']
+
+    def record_result(self, action, size_in_bytes, client_count, server_pool_size, duration, results, server_counts=('', ''),
+                      sampler=None):
         successful = sum(1 for res in results if res[0])
         failed = client_count - successful
         transferred_bytes = sum(res[2] for res in results if res[0])
         throughput = (transferred_bytes / duration) / (1024**2) if duration > 0 else 0
-        avg_duration = sum(res[1] for res in results) / client_count if client_count > 0 else 0
+        timings = [res[3] for res in results]
 
         record = {
             'timestamp': datetime.now().isoformat(),
@@ -57,9 +105,20 @@ class StressTester:
             'throughput': round(throughput, 2),
             'client_success': successful,
             'client_fail': failed,
-            'server_success': successful,
-            'server_fail': failed,
+            'server_success': server_counts[0],
+            'server_fail': server_counts[1],
+            **latency_columns(timings),
         }
+        case = dict(operation=action, volume=record['volume'], client_workers=client_count,
+                    server_workers=server_pool_size)
+        if sampler:
+            record.update(sampler.stop())
+            if self.resource_series:
+                write_series(self.resource_series, sampler.samples, **case)
+        if self.raw_output:
+            write_raw(self.raw_output, timings, **case)
+        if self.histogram_output:
+            write_histogram(self.histogram_output, timings, **case)
         self.test_data.append(record)
         self.display_result(record)
         return record
@@ -76,15 +135,22 @@ class StressTester:
         print(f"Client Gagal:           {data['client_fail']}")
         print(f"Server Sukses:          {data['server_success']}")
         print(f"Server Gagal:           {data['server_fail']}")
+        if data['latency_max_ms'] != '':
+            print(f"Latensi p50/p90/p99:    {data['latency_p50_ms']} / {data['latency_p90_ms']} / {data['latency_p99_ms']} ms (max {data['latency_max_ms']} ms)")
+            print(f"TTFB p50/p90/p99:       {data['ttfb_p50_ms']} / {data['ttfb_p90_ms']} / {data['ttfb_p99_ms']} ms (max {data['ttfb_max_ms']} ms)")
+        if data.get('cpu_peak', '') != '':
+            print(f"CPU server avg/peak:    {data['cpu_avg']} / {data['cpu_peak']} % (thread tersibuk {data['thread_cpu_peak']} %)")
+            print(f"RSS server avg/peak:    {data['rss_avg_mb']} / {data['rss_peak_mb']} MB")
+            print(f"FD/thread peak:         {data['fds_peak']} / {data['threads_peak']}")
 
     def run_all_tests(self):
         if not self.check_files():
             return False
 
         ops = ['download', 'upload']
-        sizes = ['small', 'medium', 'large']
-        client_levels = [1, 5, 50]
-        server_levels = [50]
+        sizes = list(self.test_file_map)
+        client_levels = self.client_levels
+        server_levels = self.server_levels
 
         test_index = 1
         total_tests = len(ops) * len(sizes) * len(client_levels) * len(server_levels)
@@ -109,7 +175,9 @@ class StressTester:
             'timestamp', 'operation', 'volume', 'client_workers', 'server_workers',
             'total_time', 'throughput', 'client_success', 'client_fail',
             'server_success', 'server_fail'
-        ]
+        ] + LATENCY_COLUMNS
+        if self.server_pid:
+            columns += RESOURCE_COLUMNS
 
         try:
             with open(out_file, 'w', newline='') as f:
@@ -123,27 +191,43 @@ class StressTester:
             return False
 
 
-if __name__ == "__main__":
-    import argparse
-
-    parser = argparse.ArgumentParser(description="Stress Test Automation for File Transfer Server")
+def build_parser(description, output):
+    """Opsi CLI yang sama untuk stress_test_threadpool.py dan stress_test_async.py"""
+    parser = argparse.ArgumentParser(description=description)
     parser.add_argument("--server-ip", default="172.16.16.101")
     parser.add_argument("--server-port", type=int, default=7778)
     parser.add_argument("--single-test", action="store_true")
     parser.add_argument("--operation", choices=["upload", "download"])
-    parser.add_argument("--file-size", choices=["small", "medium", "large"])
+    parser.add_argument("--file-size", help="small/medium/large, atau nama group bila memakai --manifest")
+    parser.add_argument("--manifest", help="Manifest corpus dari generator.py (path file relatif terhadap lokasi manifest)")
     parser.add_argument("--client-workers", type=int)
     parser.add_argument("--server-workers", type=int, default=1)
-    parser.add_argument("--output", default="stress_test_results.csv")
-
-    args = parser.parse_args()
-
-    tester = StressTester(args.server_ip, args.server_port)
+    parser.add_argument("--output", default=output)
+    parser.add_argument("--raw-output", help="CSV timing per request (ditambahkan per test case)")
+    parser.add_argument("--histogram-output", help="CSV histogram latensi per test case")
+    parser.add_argument("--server-pid", type=int, help="PID server lokal untuk sampling resource dari /proc")
+    parser.add_argument("--sample-interval", type=float, default=0.5, help="Interval sampling resource (detik)")
+    parser.add_argument("--resource-series", help="Direktori time-series resource per test case")
+    return parser
+
+
+def run_from_args(tester, args):
+    """Terapkan opsi dari build_parser ke tester, jalankan test, lalu simpan CSV"""
+    tester.raw_output = args.raw_output
+    tester.histogram_output = args.histogram_output
+    tester.server_pid = args.server_pid
+    tester.sample_interval = args.sample_interval
+    tester.resource_series = args.resource_series
+    if args.manifest:
+        tester.use_manifest(args.manifest)
 
     if args.single_test:
         if not all([args.operation, args.file_size, args.client_workers]):
             print("[ERROR] Missing arguments for single test: --operation, --file-size, --client-workers")
             exit(1)
+        if args.file_size not in tester.test_file_map:
+            print(f"[ERROR] Unknown file size: {args.file_size} (pilihan: {', '.join(tester.test_file_map)})")
+            exit(1)
 
         test_file = tester.test_file_map[args.file_size]
         tester.execute_test(args.operation, test_file, args.client_workers, args.server_workers)
@@ -152,3 +236,9 @@ if __name__ == "__main__":
         tester.run_all_tests()
 
     tester.export_to_csv(args.output)
+
+
+if __name__ == "__main__":
+    parser = build_parser("Stress Test Automation for File Transfer Server", "stress_test_results.csv")
+    args = parser.parse_args()
+    run_from_args(StressTester(args.server_ip, args.server_port), args)
@@ -0,0 +1,72 @@
+import os
+import csv
+import io
+
+"""
+* rekaman trace request di sisi server, untuk diputar ulang dengan replay_trace.py
+
+* satu baris CSV per request: ts (epoch detik), command, file, size (bytes
+  isi file yang dipindahkan), duration_ms, status
+* perintah batch (MGET/MUPLOAD/MDELETE) mencatat semua nama file dipisah spasi
+  dan size total
+* diaktifkan lewat argumen trace_path pada FileProtocol atau environment
+  variable FILE_SERVER_TRACE
+"""
+
+TRACE_COLUMNS = ['ts', 'command', 'file', 'size', 'duration_ms', 'status']
+
+
+def b64_size(encoded):
+    """Ukuran data asli dari string base64 tanpa perlu mendekode"""
+    if not encoded:
+        return 0
+    return len(encoded) * 3 // 4 - encoded[-2:].count('=')
+
+
+class TraceWriter:
+    """Menulis trace ke satu file yang bisa dipakai bersama oleh banyak thread/proses.
+
+    Setiap baris ditulis dengan satu os.write pada file O_APPEND, sehingga
+    baris dari worker yang berbeda tidak saling bertumpuk.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.fd = None
+        self.pid = None
+
+    def _open(self):
+        # buka ulang di proses hasil fork agar tiap worker punya descriptor sendiri
+        if self.fd is None or self.pid != os.getpid():
+            new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            self.fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+            self.pid = os.getpid()
+            if new_file:
+                os.write(self.fd, (",".join(TRACE_COLUMNS) + "\n").encode())
+        return self.fd
+
+    def record(self, ts, command, files, size, duration_ms, status):
+        line = io.StringIO()
+        csv.writer(line, lineterminator="\n").writerow(
+            [f"{ts:.6f}", command, " ".join(files), size, f"{duration_ms:.3f}", status])
+        try:
+            os.write(self._open(), line.getvalue().encode())
+        except OSError:
+            # trace tidak boleh membuat request gagal
+            pass
+
+
+def read_trace(path):
+    """Baca trace dan urutkan menurut waktu"""
+    entries = []
+    with open(path, newline='') as f:
+        for row in csv.DictReader(f):
+            entries.append(dict(
+                ts=float(row['ts']),
+                command=row['command'],
+                files=row['file'].split() if row['file'] else [],
+                size=int(row['size'] or 0),
+                duration_ms=float(row['duration_ms'] or 0),
+                status=row['status'],
+            ))
+    entries.sort(key=lambda e: e['ts'])
+    return entries